@@ -27,12 +27,41 @@ class GameConstants:
         CLUBS: '♣',
         SPADES: '♠'
     }
+
+    # Масти и достоинства в порядке построения колоды
+    SUITS = (HEARTS, DIAMONDS, CLUBS, SPADES)
+    RANKS = ('6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A')
+
+    # Стоимость карт в очках по достоинству
+    RANK_VALUES = {
+        '6': 0, '7': 0, '8': 0, '9': 0,
+        '10': 10, 'J': 2, 'Q': 3, 'K': 4, 'A': 11
+    }
+
+    # Маппинг мастей на русские названия
+    SUIT_NAMES = {
+        HEARTS: 'червы',
+        DIAMONDS: 'бубны',
+        CLUBS: 'трефы',
+        SPADES: 'пики'
+    }
     
     # Константы для идентификации игроков
     PLAYER_1_1 = 11  # Первый игрок первой команды
     PLAYER_1_2 = 12  # Второй игрок первой команды
     PLAYER_2_1 = 21  # Первый игрок второй команды
     PLAYER_2_2 = 22  # Второй игрок второй команды
+
+    # Все позиции за столом в порядке раздачи карт
+    PLAYER_POSITIONS = (PLAYER_1_1, PLAYER_1_2, PLAYER_2_1, PLAYER_2_2)
+
+    # Маппинг позиций игроков на команды
+    PLAYER_TEAMS = {
+        PLAYER_1_1: TEAM_1,
+        PLAYER_1_2: TEAM_1,
+        PLAYER_2_1: TEAM_2,
+        PLAYER_2_2: TEAM_2
+    }
     
     # Перечисление состояний игры
     class Status(Enum):
@@ -7,6 +7,9 @@
 Автор: ShamaVibe Team
 """
 
+import random
+from functools import lru_cache
+
 from constants import GameConstants
 
 class GameException(Exception):
@@ -20,7 +23,23 @@ class InvalidPlayerAction(GameException):
     """Недопустимое действие игрока"""
     pass
 
+# Номер карты в колоде: масть * 9 + достоинство (0..35)
+CARD_IDS = {
+    (suit, rank): suit_index * len(GameConstants.RANKS) + rank_index
+    for suit_index, suit in enumerate(GameConstants.SUITS)
+    for rank_index, rank in enumerate(GameConstants.RANKS)
+}
+
+# Строковые представления карт по их номеру в колоде
+CARD_REPRS = tuple(
+    f"{rank:>2}{GameConstants.SUIT_SYMBOLS[suit]}"
+    for suit in GameConstants.SUITS
+    for rank in GameConstants.RANKS
+)
+
 class Card:
+    __slots__ = ('suit', 'rank', 'value', 'id')
+    
     def __init__(self, suit: str, rank: str, value: int):
         """
         Инициализация карты.
@@ -32,6 +51,19 @@ class Card:
         self.suit = suit
         self.rank = rank
         self.value = value
+        self.id = CARD_IDS.get((suit, rank))  # Номер карты в колоде, None для неизвестной карты
+
+    @classmethod
+    def from_id(cls, card_id: int) -> 'Card':
+        """
+        Восстановление карты по её номеру в колоде.
+        
+        :param card_id: номер карты (0..35), см. CARD_IDS
+        :return: новая карта с мастью, достоинством и стоимостью
+        """
+        suit_index, rank_index = divmod(card_id, len(GameConstants.RANKS))
+        rank = GameConstants.RANKS[rank_index]
+        return cls(GameConstants.SUITS[suit_index], rank, GameConstants.RANK_VALUES[rank])
 
     def get_order(self, trump=None):
 
@@ -47,10 +79,19 @@ class Card:
         
     def __repr__(self):
         """Строковое представление карты с символами мастей"""
+        if self.id is not None:
+            return CARD_REPRS[self.id]
         symbol = GameConstants.SUIT_SYMBOLS.get(self.suit, '?')
         return f"{self.rank:>2}{symbol}"
     
+# Все 36 карт колоды, создаются один раз и переиспользуются во всех раздачах
+DECK = tuple(Card.from_id(card_id) for card_id in range(len(CARD_IDS)))
+SHAMA = DECK[CARD_IDS[(GameConstants.CLUBS, '6')]]  # Шестерка треф
+
 class Player:
+    __slots__ = ('id', 'name', 'hand', 'stat')
+    is_bot = False  # Реальный игрок, получает сообщения в Telegram
+    
     def __init__(self, player_id: int, player_name: str):
         """
         Инициализация игрока.
@@ -84,6 +125,10 @@ class Player:
         """Показать карты на руке у игрока"""
         return self.hand
         
+    def set_hand(self, cards: list):
+        """Выдать игроку карты на руки, заменив текущие"""
+        self.hand = cards
+        
     def clear_hand(self):
         """Убрать карты на руке у игрока"""
         self.hand = []
@@ -100,21 +145,42 @@ class Player:
         """Строковое представление игрока"""
         return f"{self.name}"
 
+class BotPlayer(Player):
+    """Фиктивный игрок (бот), занимающий место за столом.
+    
+    Такому игроку не отправляются сообщения: он не попадает
+    в MatchState.real_players.
+    """
+    __slots__ = ()
+    is_bot = True
+
 class MatchState:
     """Класс для хранения состояния матча в игре Шама.
     
     Атрибуты:
         status (GameConstants.Status): Перечисление статуса игры
         players (dict): Словарь игроков формата {id: Player}
+        position_by_id (dict): Позиции игроков по их ID {player_id: player_index}
+        real_players (list): Игроки без ботов, в порядке добавления
         match_scores (dict): Очки команд за игры (ключи: 10, 20)
         game_scores (dict): Очки команд за взятки (ключи: 10, 20)
         first_player_index (int): ID игрока с шестеркой треф (шамой)
         trump (str): Текущий козырь (масть)
+        trump_symbol (str): Символ текущего козыря ('?', пока козырь не выбран)
         current_player_index (int): ID текущего игрока
         current_table (list): Карты, выложенные на стол в текущем коны
         current_turn (int): Номер текущего хода (1-9)
+        team1_header (str): Строка состава первой команды для вывода
+        team2_header (str): Строка состава второй команды для вывода
     """
     
+    __slots__ = (
+        'status', 'players', 'position_by_id', 'real_players', 'match_scores',
+        'game_scores', 'first_player_index', 'trump', 'trump_symbol',
+        'current_player_index', 'current_table', 'current_turn',
+        'team1_header', 'team2_header',
+    )
+    
     def __init__(self):
         """Инициализация состояния игры"""
         self.status = GameConstants.Status.WAITING_PLAYERS
@@ -124,6 +190,8 @@ class MatchState:
             GameConstants.PLAYER_2_1: None, 
             GameConstants.PLAYER_2_2: None
         }  # Список игроков
+        self.position_by_id = {}  # Позиции игроков по ID {player_id: player_index}
+        self.real_players = []  # Игроки, которым отправляются сообщения (без ботов)
         self.match_scores = {
             GameConstants.TEAM_1: 0, 
             GameConstants.TEAM_2: 0
@@ -134,9 +202,12 @@ class MatchState:
         }  # Очки команд за взятки
         self.first_player_index = 0  # Индекс игрока с шамой
         self.trump = None  # Текущий козырь
+        self.trump_symbol = '?'  # Символ текущего козыря для вывода
         self.current_player_index = 0  # Индекс текущего игрока
         self.current_table = []  # Карты на столе
         self.current_turn = 1  # Номер хода
+        self.team1_header = ''  # Состав первой команды, заполняется интерфейсом
+        self.team2_header = ''  # Состав второй команды, заполняется интерфейсом
                 
     def set_status(self, status: GameConstants.Status):
         """Устанавливает состояние игры через перечисление.
@@ -157,6 +228,7 @@ class MatchState:
         
     def set_trump(self, suit: str) -> tuple:
         self.trump = suit
+        self.trump_symbol = GameConstants.SUIT_SYMBOLS.get(suit, '?')
         self.set_status(GameConstants.Status.TRUMP_SELECTED)
         
     def add_player(self, player_index: int, player: Player):
@@ -176,9 +248,12 @@ class MatchState:
         # Проверяем, что игра в состоянии ожидания игроков и валидный индекс
         if self.status == GameConstants.Status.WAITING_PLAYERS:
             self.players[player_index] = player
+            self.position_by_id[player.id] = player_index
+            if not player.is_bot:
+                self.real_players.append(player)
             
             # Если добавлены все 4 игрока, обновляем состояние
-            if sum(1 for p in self.players.values() if p is not None) == 4:
+            if None not in self.players.values():
                 self.set_status(GameConstants.Status.PLAYERS_ADDED)
         else:
             raise InvalidPlayerAction("Игра не создана или стол полон")
@@ -201,19 +276,73 @@ class MatchState:
             raise ValueError("Неверный тип счета")
 
     def clear_score(self, score_type: str):
-        """Очистить счет матча/игры у команд"""
+        """Очистить счет матча/игры у команд.
+        
+        Счет заменяется новым словарем, поэтому ранее полученный
+        словарь со счетом остается неизменным.
+        """
         if score_type == 'match':
-            self.match_scores[10] = 0
-            self.match_scores[20] = 0
+            self.match_scores = {GameConstants.TEAM_1: 0, GameConstants.TEAM_2: 0}
         elif score_type == 'game':
-            self.game_scores[10] = 0
-            self.game_scores[20] = 0
+            self.game_scores = {GameConstants.TEAM_1: 0, GameConstants.TEAM_2: 0}
         else:
             raise ValueError("Неверный тип счета")
         
     def show_table(self):
-        return ', '.join([f"{card['player']}: {card['card']}" for card in self.current_table])
+        return ', '.join(f"{card['player']}: {card['card']}" for card in self.current_table)
         
+@lru_cache(maxsize=None)
+def card_power(suit: str, rank: str, first_suit: str, trump: str) -> tuple:
+    """Сила карты в коне, см. GameEngine.calculate_card_power.
+    
+    Различных комбинаций аргументов немного (36 карт x 4 масти хода x 4 козыря),
+    поэтому результаты кэшируются и при подсчете взяток не вычисляются заново.
+    """
+    # Шестерка треф - самая сильная карта в игре
+    if suit == GameConstants.CLUBS and rank == '6':
+        return (4, 0)  # Максимальный приоритет
+    
+    # Валеты (всегда козыри, независимо от козырной масти)
+    if rank == 'J':
+        # Порядок валетов: ♣ > ♠ > ♥ > ♦
+        return (3, GameConstants.SUIT_ORDER.get(suit, 0))
+    
+    # Козырные карты (кроме валетов и шестерки треф)
+    if suit == trump:
+        # Порядок козырных: A > 10 > K > Q > 9 > 8 > 7 > 6
+        return (2, GameConstants.RANK_ORDER.get(rank, 0))
+    
+    # Карты масти первого хода
+    if suit == first_suit:
+        return (1, GameConstants.RANK_ORDER.get(rank, 0))
+    
+    # Остальные карты (младше всех)
+    return (0, 0)
+
+# Статус игры по количеству карт на столе после хода (1-4)
+TABLE_STATUSES = (
+    None,
+    GameConstants.Status.PLAYED_CARD_1,
+    GameConstants.Status.PLAYED_CARD_2,
+    GameConstants.Status.PLAYED_CARD_3,
+    GameConstants.Status.TRICK_COMPLETED,
+)
+
+# Очки, начисляемые проигравшей команде за раздачу, по числу набранных ею взяток:
+# 0 взяток, меньше 30, меньше 60, ровно 60
+SHAMA_TEAM_PENALTIES = (
+    (12, 'сразу 12 очков'),
+    (6, 'шесть очков'),
+    (3, 'три очка'),
+    (2, 'два очка'),
+)
+OTHER_TEAM_PENALTIES = (
+    (6, 'шесть очков'),
+    (3, 'три очка'),
+    (1, 'одно очко'),
+    (1, 'одно очко'),
+)
+
 class GameEngine:
     """Игровой движок, реализующий логику игры Шама.
     
@@ -231,12 +360,12 @@ class GameEngine:
         
     @staticmethod
     def create_deck() -> list[Card]:
-        """Создание колоды из 36 карт"""
-        suits = ['hearts', 'diamonds', 'clubs', 'spades']
-        ranks = ['6', '7', '8', '9', '10', 'J', 'Q', 'K', 'A']
-        values = [0, 0, 0, 0, 10, 2, 3, 4, 11]  # Значения карт
+        """Создание колоды из 36 карт.
         
-        return [Card(suit, rank, values[i]) for suit in suits for i, rank in enumerate(ranks)]
+        Карты не изменяются после создания, поэтому каждая раздача
+        получает новый список из одних и тех же объектов DECK.
+        """
+        return list(DECK)
     
     def deal_cards(self):
         """Раздача карт игрокам (по 9 карт каждому).
@@ -244,22 +373,16 @@ class GameEngine:
         Создаёт колоду, перемешивает и раздаёт карты игрокам.
         Также определяет, у какого игрока шама (6♣).
         """
-        import random
         deck = self.create_deck()
         random.shuffle(deck)
-        # Очищаем руки каждого игрока перед раздачей
-        for player in self.state.players.values():
-            player.clear_hand()
-
-        # Раздача карт
-        player_ids = list(self.state.players.keys())
-        for i, card in enumerate(deck):
-            player_index = player_ids[i % len(player_ids)]
-            self.state.players[player_index].add_card(card)
-            
-            # Проверяем, является ли карта шестеркой треф (шамой)
-            if card.rank == '6' and card.suit == GameConstants.CLUBS:
-                self.state.first_player_index = player_index
+
+        # Раздача карт по кругу: игрок на i-м месте получает каждую 4-ю карту начиная с i-й
+        player_ids = GameConstants.PLAYER_POSITIONS
+        for seat, player_index in enumerate(player_ids):
+            self.state.players[player_index].set_hand(deck[seat::4])
+
+        # Шама у игрока, которому досталась карта с её позиции в колоде
+        self.state.first_player_index = player_ids[deck.index(SHAMA) % 4]
     
     def start_game(self) -> tuple:
         """Запускает новую игру (раздачу).
@@ -292,7 +415,7 @@ class GameEngine:
         if player_index != self.state.first_player_index:
             raise InvalidPlayerAction("Только игрок с шестеркой треф может устанавливать козырь")
         
-        if suit not in GameConstants.SUIT_SYMBOLS.keys():
+        if suit not in GameConstants.SUIT_SYMBOLS:
             raise InvalidPlayerAction("Недопустимая масть для козыря")
         self.state.set_trump(suit)
 
@@ -391,11 +514,12 @@ class GameEngine:
             raise InvalidPlayerAction("Уже сделали 9 ходов!")
         
         # Проверяем, что на столе меньше 4-х карт
-        if len(self.state.current_table) >= 4:
+        table_size = len(self.state.current_table)
+        if table_size >= 4:
             raise InvalidPlayerAction("На столе уже 4 карты!")
         
         # Выставляем номер хода
-        if len(self.state.current_table) == 3:
+        if table_size == 3:
             self.state.set_current_turn()
         
         # Проверяем, соответствует ли ход правилам игры
@@ -406,19 +530,13 @@ class GameEngine:
         # Играем карту
         card = player.play_card(card_index)
         self.state.put_card(player_index, card)
-        card_count = len(self.state.current_table)
+        card_count = table_size + 1
         
         # Устанавливаем новый статус в зависимости от количества карт на столе
-        if card_count == 1:
-            self.state.set_status(GameConstants.Status.PLAYED_CARD_1)
-        elif card_count == 2:
-            self.state.set_status(GameConstants.Status.PLAYED_CARD_2)
-        elif card_count == 3:
-            self.state.set_status(GameConstants.Status.PLAYED_CARD_3)
-        elif card_count == 4:
-            self.state.set_status(GameConstants.Status.TRICK_COMPLETED)
-
-        if GameConstants.Status.PLAYING_CARDS.value < self.state.status.value < GameConstants.Status.TRICK_COMPLETED.value:
+        self.state.set_status(TABLE_STATUSES[card_count])
+
+        # Пока кон не завершен, ход переходит следующему игроку
+        if card_count < 4:
             next_player_index = GameConstants.PLAYERS_QUEUE[self.state.current_player_index]
             self.state.set_current_player_index(next_player_index)
 
@@ -443,26 +561,7 @@ class GameEngine:
             tuple: (приоритет_группы, приоритет_внутри_группы)
                   для сравнения карт между собой
         """
-        # Шестерка треф - самая сильная карта в игре
-        if card.suit == GameConstants.CLUBS and card.rank == '6':
-            return (4, 0)  # Максимальный приоритет
-        
-        # Валеты (всегда козыри, независимо от козырной масти)
-        if card.rank == 'J':
-            # Порядок валетов: ♣ > ♠ > ♥ > ♦
-            return (3, GameConstants.SUIT_ORDER.get(card.suit, 0))
-        
-        # Козырные карты (кроме валетов и шестерки треф)
-        if card.suit == trump:
-            # Порядок козырных: A > 10 > K > Q > 9 > 8 > 7 > 6
-            return (2, GameConstants.RANK_ORDER.get(card.rank, 0))
-        
-        # Карты масти первого хода
-        if card.suit == first_suit:
-            return (1, GameConstants.RANK_ORDER.get(card.rank, 0))
-        
-        # Остальные карты (младше всех)
-        return (0, 0)
+        return card_power(card.suit, card.rank, first_suit, trump)
     
     def complete_turn(self):
         """Завершение кона и определение победителя.
@@ -484,14 +583,14 @@ class GameEngine:
             # Определяем победителя взятки по правилам Шамы
             first_suit = self.state.current_table[0]['card'].suit
             trump = self.state.trump
-            # Находим карту с максимальной силой
+            # Находим карту с максимальной силой (сила карт кэшируется в card_power)
             strongest_card = max(
                 self.state.current_table, 
-                key=lambda x: self.calculate_card_power(x['card'], first_suit, trump)
+                key=lambda x: card_power(x['card'].suit, x['card'].rank, first_suit, trump)
             )
             winning_player_index = strongest_card['player_index']
             winning_card = strongest_card['card']
-            winning_team_index = winning_player_index // 10 * 10
+            winning_team_index = GameConstants.PLAYER_TEAMS[winning_player_index]
             
             # Подсчитываем очки за взятку
             trick_points = sum(c['card'].value for c in self.state.current_table)
@@ -525,30 +624,20 @@ class GameEngine:
             - меньше 30 взяток – 3 очка
             - меньше 60 взяток – 1 очко
             """
-            shama_team = first_player_index // 10 * 10
+            shama_team = GameConstants.PLAYER_TEAMS[first_player_index]
             losed_team = 10 if scores[10] < scores[20] or scores[10] == 60 and shama_team == 10 else 20
-            if shama_team == losed_team:
-                if scores[losed_team] == 0:
-                    game_results = scores, losed_team, 12, 'сразу 12 очков'
-                elif scores[losed_team] < 30:
-                    game_results = scores, losed_team, 6, 'шесть очков'
-                elif scores[losed_team] < 60:
-                    game_results = scores, losed_team, 3, 'три очка'
-                else:
-                    game_results = scores, losed_team, 2, 'два очка'
-            else:
-                if scores[losed_team] == 0:
-                    game_results = scores, losed_team, 6, 'шесть очков'
-                elif scores[losed_team] < 30:
-                    game_results = scores, losed_team, 3, 'три очка'
-                else:
-                    game_results = scores, losed_team, 1, 'одно очко'
-            return game_results
+            # Индекс строки таблицы: 0 взяток, меньше 30, меньше 60, ровно 60
+            losed_score = scores[losed_team]
+            bucket = (losed_score > 0) + (losed_score >= 30) + (losed_score >= 60)
+            points_table = SHAMA_TEAM_PENALTIES if shama_team == losed_team else OTHER_TEAM_PENALTIES
+            losed_points, losed_points_text = points_table[bucket]
+            return scores, losed_team, losed_points, losed_points_text
 
         # Проверка завершения игры (9 взяток)
         if self.state.current_turn > 9:
-            scores, losed_team, losed_points, losed_points_text = get_points(self.state.first_player_index, self.state.game_scores.copy())
+            scores, losed_team, losed_points, losed_points_text = get_points(self.state.first_player_index, self.state.game_scores)
             self.state.increase_score(losed_team, losed_points, 'match')
+            # clear_score подменяет словарь, так что scores сохраняет итог раздачи
             self.state.clear_score('game')
             if self.state.match_scores[losed_team] < 12:
                 self.state.set_status(GameConstants.Status.NEW_DEAL_READY)
@@ -9,7 +9,7 @@
 
 import logging
 import os
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
 
 import psycopg2
 from psycopg2.extras import DictCursor, Json
@@ -432,6 +432,43 @@ class DatabaseManager:
         finally:
             self.return_connection(conn)
     
+    def update_player_stats_bulk(self, deltas: Dict[int, Tuple[bool, int, int]]) -> bool:
+        """
+        Обновляет статистику нескольких игроков в одной транзакции.
+        
+        :param deltas: Словарь {ID игрока: (won, tricks, shama_calls)}
+        :return: True в случае успеха, False в случае ошибки
+        """
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    UPDATE players SET
+                        games = games + 1,
+                        wins = wins + %s,
+                        total_tricks = total_tricks + %s,
+                        total_shama_calls = total_shama_calls + %s
+                    WHERE id = %s
+                    """,
+                    [
+                        (1 if won else 0, tricks, shama_calls, player_id)
+                        for player_id, (won, tricks, shama_calls) in deltas.items()
+                    ]
+                )
+                conn.commit()
+                logger.info(f"Обновлена статистика игроков (ID: {', '.join(map(str, deltas))})")
+                return True
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Ошибка при обновлении статистики игроков: {e}")
+            return False
+        finally:
+            self.return_connection(conn)
+    
     def log_event(self, tg_id: Optional[int], event_type: str, event_data: Dict[str, Any]) -> Optional[int]:
         """
         Логирует событие в базе данных.
@@ -465,6 +502,39 @@ class DatabaseManager:
         finally:
             self.return_connection(conn)
     
+    def log_events_batch(self, events: List[tuple]) -> bool:
+        """
+        Логирует пачку событий в базе данных одной транзакцией.
+        
+        :param events: Список кортежей (tg_id, username, event_type, event_data, timestamp)
+        :return: True в случае успеха, False в случае ошибки
+        """
+        conn = self.get_connection()
+        if not conn:
+            return False
+        
+        try:
+            with conn.cursor() as cur:
+                cur.executemany(
+                    """
+                    INSERT INTO events (tg_id, timestamp, event_type, event_data)
+                    VALUES (%s, %s, %s, %s)
+                    """,
+                    [
+                        (tg_id, timestamp, event_type, Json(event_data))
+                        for tg_id, _, event_type, event_data, timestamp in events
+                    ]
+                )
+                conn.commit()
+                logger.info(f"Залогировано событий: {len(events)}")
+                return True
+        except Exception as e:
+            conn.rollback()
+            logger.error(f"Ошибка при логировании событий: {e}")
+            return False
+        finally:
+            self.return_connection(conn)
+    
     def get_player_stats(self, tg_id: int) -> Optional[Dict[str, Any]]:
         """
         Получает расширенную статистику игрока.
@@ -482,7 +552,7 @@ class DatabaseManager:
                     """
                     SELECT 
                         name, games, wins, total_tricks, total_shama_calls,
-                        CASE WHEN games > 0 THEN ROUND(wins::float / games * 100, 1) ELSE 0 END AS win_rate
+                        CASE WHEN games > 0 THEN ROUND(wins::numeric / games * 100, 2)::float ELSE 0 END AS win_rate
                     FROM players
                     WHERE tg_id = %s
                     """,
@@ -498,6 +568,37 @@ class DatabaseManager:
         finally:
             self.return_connection(conn)
     
+    def top_players(self, n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Возвращает таблицу лидеров по количеству побед.
+        
+        :param n: Количество игроков в таблице лидеров
+        :return: Список статистик игроков, отсортированный по убыванию побед
+        """
+        conn = self.get_connection()
+        if not conn:
+            return []
+        
+        try:
+            with conn.cursor(cursor_factory=DictCursor) as cur:
+                cur.execute(
+                    """
+                    SELECT 
+                        tg_id AS id, name, games, wins,
+                        CASE WHEN games > 0 THEN ROUND(wins::numeric / games * 100, 2)::float ELSE 0 END AS win_rate
+                    FROM players
+                    ORDER BY wins DESC
+                    LIMIT %s
+                    """,
+                    (n,)
+                )
+                return [dict(row) for row in cur.fetchall()]
+        except Exception as e:
+            logger.error(f"Ошибка при получении таблицы лидеров: {e}")
+            return []
+        finally:
+            self.return_connection(conn)
+    
     def close(self):
         """Закрывает пул соединений с базой данных."""
         if self.connection_pool:
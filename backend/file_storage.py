@@ -8,12 +8,21 @@
 """
 
 import os
+import asyncio
 import csv
+import heapq
+import itertools
 import json
 import logging
-import uuid
+import threading
+import time
 import datetime
-from typing import Dict, List, Optional, Any
+from typing import Dict, List, Optional, Any, Tuple
+
+try:
+    import orjson  # Быстрая сериализация JSON, если установлена
+except ImportError:
+    orjson = None
 
 # Настройка логирования
 logging.basicConfig(
@@ -22,6 +31,17 @@ logging.basicConfig(
 )
 logger = logging.getLogger(__name__)
 
+def _dump_event(event: Dict[str, Any]) -> bytes:
+    """
+    Сериализует событие в строку JSON Lines (UTF-8).
+    
+    :param event: Словарь события (datetime сериализуется в ISO-формат)
+    :return: Байты строки события с завершающим переводом строки
+    """
+    if orjson is not None:
+        return orjson.dumps(event, option=orjson.OPT_APPEND_NEWLINE)
+    return (json.dumps(event, ensure_ascii=False, default=datetime.datetime.isoformat) + '\n').encode('utf-8')
+
 class FileStorage:
     """Класс для работы с файловым хранилищем."""
     
@@ -42,51 +62,80 @@ class FileStorage:
         self.events_dir = os.path.join(self.storage_dir, 'events')
         
         # Создаем директории, если они не существуют
-        for directory in [self.storage_dir, self.players_dir, self.matches_dir, 
-                         self.games_dir, self.turns_dir, self.events_dir]:
-            if not os.path.exists(directory):
-                os.makedirs(directory)
+        for directory in (self.storage_dir, self.players_dir, self.matches_dir,
+                          self.games_dir, self.turns_dir, self.events_dir):
+            os.makedirs(directory, exist_ok=True)
         
         # Файлы с данными
         self.players_file = os.path.join(self.players_dir, 'players.csv')
         self.matches_file = os.path.join(self.matches_dir, 'matches.csv')
         self.games_file = os.path.join(self.games_dir, 'games.csv')
         self.turns_file = os.path.join(self.turns_dir, 'turns.csv')
+        self.events_file = os.path.join(self.events_dir, 'events.jsonl')
+        self.events_seq_file = os.path.join(self.events_dir, '_events_seq')
         
         # Инициализируем файлы, если они не существуют
         self._init_files()
+        
+        # Счетчик событий: метка старта процесса + монотонный номер
+        self._start_epoch = int(time.time())
+        self._event_seq = self._load_event_seq()
+        self._event_counter = itertools.count(self._event_seq + 1)
+        
+        # Файл событий открыт на все время работы хранилища;
+        # запись идет из пула потоков, поэтому под блокировкой
+        self._events_fp = open(self.events_file, 'ab')
+        self._events_lock = threading.Lock()
     
     def _init_files(self):
         """Инициализирует структуру файлов, если они не существуют."""
         # Игроки
-        if not os.path.exists(self.players_file):
-            with open(self.players_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['id', 'username', 'name', 'games', 'wins', 
-                                'total_tricks', 'total_shama_calls', 'created_at'])
+        self._init_csv(self.players_file, ['id', 'username', 'name', 'games', 'wins', 
+                                           'total_tricks', 'total_shama_calls', 'created_at'])
         
         # Матчи
-        if not os.path.exists(self.matches_file):
-            with open(self.matches_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['match_id', 'start_time', 'end_time', 'player_11', 'player_12', 
-                                'player_21', 'player_22', 'winning_team', 'total_score_1', 
-                                'total_score_2'])
+        self._init_csv(self.matches_file, ['match_id', 'start_time', 'end_time', 'player_11', 'player_12', 
+                                           'player_21', 'player_22', 'winning_team', 'total_score_1', 
+                                           'total_score_2'])
         
         # Игры (раздачи)
-        if not os.path.exists(self.games_file):
-            with open(self.games_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['match_id', 'game_id', 'trump', 'shama_player', 
-                                'hand_11', 'hand_12', 'hand_21', 'hand_22', 'created_at'])
+        self._init_csv(self.games_file, ['match_id', 'game_id', 'trump', 'shama_player', 
+                                         'hand_11', 'hand_12', 'hand_21', 'hand_22', 'created_at'])
         
         # Ходы
-        if not os.path.exists(self.turns_file):
-            with open(self.turns_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.writer(f)
-                writer.writerow(['match_id', 'game_id', 'turn_id', 'first_player', 
-                                'card_11', 'card_12', 'card_21', 'card_22', 
-                                'loot_value', 'looting_team', 'created_at'])
+        self._init_csv(self.turns_file, ['match_id', 'game_id', 'turn_id', 'first_player', 
+                                         'card_11', 'card_12', 'card_21', 'card_22', 
+                                         'loot_value', 'looting_team', 'created_at'])
+    
+    @staticmethod
+    def _init_csv(path: str, header: List[str]):
+        """
+        Создает CSV-файл с заголовком, если его еще нет.
+        
+        Режим 'x' проверяет существование и создает файл одним системным
+        вызовом, без отдельного os.path.exists (и без гонки между ними).
+        """
+        try:
+            with open(path, 'x', newline='', encoding='utf-8') as f:
+                csv.writer(f).writerow(header)
+        except FileExistsError:
+            pass
+    
+    def _load_event_seq(self) -> int:
+        """Читает последний сохраненный номер события."""
+        try:
+            with open(self.events_seq_file, 'r', encoding='utf-8') as f:
+                return int(f.read().strip() or 0)
+        except (OSError, ValueError):
+            return 0
+    
+    def _save_event_seq(self):
+        """Сохраняет последний выданный номер события."""
+        try:
+            with open(self.events_seq_file, 'w', encoding='utf-8') as f:
+                f.write(str(self._event_seq))
+        except OSError as e:
+            logger.error(f"Ошибка при сохранении счетчика событий: {e}")
     
     async def init_database(self):
         """Инициализирует хранилище данных."""
@@ -294,32 +343,46 @@ class FileStorage:
         :param shama_calls: Количество раз, когда игрок объявлял козырь
         :return: True в случае успеха, False в случае ошибки
         """
+        return await self.update_player_stats_bulk({player_id: (won, tricks, shama_calls)})
+    
+    async def update_player_stats_bulk(self, deltas: Dict[int, Tuple[bool, int, int]]) -> bool:
+        """
+        Обновляет статистику нескольких игроков за один проход по файлу.
+        
+        В конце матча обновляются все 4 игрока: вместо четырех полных
+        перезаписей players.csv файл читается и записывается один раз.
+        
+        :param deltas: Словарь {ID игрока: (won, tricks, shama_calls)}
+        :return: True в случае успеха, False в случае ошибки
+        """
         try:
             # Читаем текущие данные об игроках
-            players = []
             with open(self.players_file, 'r', newline='', encoding='utf-8') as f:
                 reader = csv.DictReader(f)
-                for row in reader:
-                    players.append(row)
+                fieldnames = reader.fieldnames
+                players = list(reader)
             
-            # Обновляем статистику игрока
+            # Обновляем статистику игроков
             for player in players:
-                if int(player['id']) == player_id:
-                    player['games'] = int(player['games']) + 1
-                    player['wins'] = int(player['wins']) + (1 if won else 0)
-                    player['total_tricks'] = int(player['total_tricks']) + tricks
-                    player['total_shama_calls'] = int(player['total_shama_calls']) + shama_calls
+                delta = deltas.get(int(player['id']))
+                if delta is None:
+                    continue
+                won, tricks, shama_calls = delta
+                player['games'] = int(player['games']) + 1
+                player['wins'] = int(player['wins']) + (1 if won else 0)
+                player['total_tricks'] = int(player['total_tricks']) + tricks
+                player['total_shama_calls'] = int(player['total_shama_calls']) + shama_calls
             
             # Перезаписываем файл с обновленными данными
             with open(self.players_file, 'w', newline='', encoding='utf-8') as f:
-                writer = csv.DictWriter(f, fieldnames=players[0].keys())
+                writer = csv.DictWriter(f, fieldnames=fieldnames)
                 writer.writeheader()
                 writer.writerows(players)
             
-            logger.info(f"Обновлена статистика игрока (ID: {player_id})")
+            logger.info(f"Обновлена статистика игроков (ID: {', '.join(map(str, deltas))})")
             return True
         except Exception as e:
-            logger.error(f"Ошибка при обновлении статистики игрока: {e}")
+            logger.error(f"Ошибка при обновлении статистики игроков: {e}")
             return False
     
     async def get_player_stats(self, id: int) -> Optional[Dict[str, Any]]:
@@ -354,7 +417,38 @@ class FileStorage:
             logger.error(f"Ошибка при получении статистики игрока: {e}")
             return None
     
-    async def log_event(self, player_id: Optional[int], player_username: str, event_type: str, event_data: Dict[str, Any]) -> Optional[int]:
+    async def top_players(self, n: int = 10) -> List[Dict[str, Any]]:
+        """
+        Возвращает таблицу лидеров по количеству побед.
+        
+        Файл игроков читается за один проход, а отбор первых n записей
+        выполняется через heapq без сортировки всего списка.
+        
+        :param n: Количество игроков в таблице лидеров
+        :return: Список статистик игроков, отсортированный по убыванию побед
+        """
+        try:
+            with open(self.players_file, 'r', newline='', encoding='utf-8') as f:
+                reader = csv.DictReader(f)
+                top = heapq.nlargest(n, reader, key=lambda row: int(row['wins']))
+            
+            leaders = []
+            for row in top:
+                games = int(row['games'])
+                wins = int(row['wins'])
+                leaders.append({
+                    'id': int(row['id']),
+                    'name': row['name'],
+                    'games': games,
+                    'wins': wins,
+                    'win_rate': round(wins / games * 100, 2) if games > 0 else 0,
+                })
+            return leaders
+        except Exception as e:
+            logger.error(f"Ошибка при получении таблицы лидеров: {e}")
+            return []
+    
+    async def log_event(self, player_id: Optional[int], player_username: str, event_type: str, event_data: Dict[str, Any]) -> Optional[str]:
         """
         Логирует событие в файл.
         
@@ -363,31 +457,62 @@ class FileStorage:
         :param event_data: Данные события
         :return: ID события или None в случае ошибки
         """
+        event_ids = await self.log_events_batch([
+            (player_id, player_username, event_type, event_data, datetime.datetime.now())
+        ])
+        return event_ids[0] if event_ids else None
+    
+    async def log_events_batch(self, events: List[Tuple[Optional[int], str, str, Any, datetime.datetime]]) -> List[str]:
+        """
+        Логирует пачку событий одной записью в файл events.jsonl.
+        
+        :param events: Список кортежей (tg_id, username, event_type, event_data, timestamp)
+        :return: Список ID событий или пустой список в случае ошибки
+        """
         try:
-            # Генерируем имя файла для события
-            event_id = str(uuid.uuid4())
-            event_file = os.path.join(self.events_dir, f"event_{event_id}.json")
-            
-            # Создаем структуру события
-            event = {
-                'id': event_id,
-                'player_id': player_id,
-                'player_username': player_username,
-                'timestamp': datetime.datetime.now().isoformat(),
-                'event_type': event_type,
-                'event_data': event_data
-            }
+            event_ids = []
+            lines = []
+            for player_id, player_username, event_type, event_data, timestamp in events:
+                # Генерируем ID события без обращения к os.urandom
+                # (next() у itertools.count атомарен под GIL)
+                self._event_seq = next(self._event_counter)
+                event_id = f"{self._start_epoch}-{self._event_seq}"
+                
+                # Создаем структуру события
+                event = {
+                    'id': event_id,
+                    'player_id': player_id,
+                    'player_username': player_username,
+                    'timestamp': timestamp,
+                    'event_type': event_type,
+                    'event_data': event_data
+                }
+                lines.append(_dump_event(event))
+                event_ids.append(event_id)
             
-            # Записываем событие в файл
-            with open(event_file, 'w', encoding='utf-8') as f:
-                json.dump(event, f, ensure_ascii=False, indent=2)
+            # Записываем все события одним вызовом write в отдельном потоке,
+            # чтобы файловый ввод-вывод не блокировал цикл событий
+            await asyncio.to_thread(self._append_events, b''.join(lines))
             
-            logger.info(f"Событие {event_type} залогировано (ID: {event_id})")
-            return event_id
+            logger.info(f"Залогировано событий: {len(event_ids)} (последний ID: {event_ids[-1] if event_ids else '-'})")
+            return event_ids
         except Exception as e:
-            logger.error(f"Ошибка при логировании события: {e}")
-            return None
+            logger.error(f"Ошибка при логировании событий: {e}")
+            return []
+    
+    def _append_events(self, data: bytes):
+        """
+        Дописывает сериализованные события в файл events.jsonl.
+        
+        :param data: Строки событий в формате JSON Lines (UTF-8)
+        """
+        with self._events_lock:
+            self._events_fp.write(data)
+            self._events_fp.flush()
     
     def close(self):
         """Закрывает хранилище данных."""
+        with self._events_lock:
+            self._events_fp.close()
+        self._save_event_seq()
         logger.info("Файловое хранилище закрыто")
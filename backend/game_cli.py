@@ -10,9 +10,22 @@
 from core import MatchState, GameEngine, Player, Card, InvalidPlayerAction
 from constants import GameConstants
 
-def show_rules():
-    print(
-        """
+# Локальные псевдонимы для статусов, проверяемых в игровом цикле
+Status = GameConstants.Status
+PLAYERS_ADDED_CODE = Status.PLAYERS_ADDED.value
+LOOP_END_STATUSES = (Status.MATCH_COMPLETED, Status.GAME_FINISHED)
+
+# Масти в порядке пунктов меню выбора козыря: 1 - ♣, 2 - ♠, 3 - ♥, 4 - ♦
+TRUMP_SUITS = (GameConstants.CLUBS, GameConstants.SPADES, GameConstants.HEARTS, GameConstants.DIAMONDS)
+
+# Команды выбора козыря, завершающие текущую раздачу: перераздача и выход в меню
+TRUMP_EXIT_COMMANDS = {
+    're': Status.PLAYERS_ADDED,
+    'f': Status.GAME_FINISHED,
+}
+
+# Статичные тексты собираются один раз при импорте модуля
+RULES_TEXT = """
     ПРАВИЛА ИГРЫ
 Играются классические 36 игральных карт (карты: 6, 7, 8, 9, 10, валет, дама, король, туз и у каждой карты есть 4 масти: крести, пики, черви, бубны, в итоге 4 x 9 = 36 карт). В игре принимает участие 2 команды по 2 игрока, игроки ходят фиксированно друг за другом по кругу, начало хода может начаться с любого игрока в зависимости от ситуации в игре (1.1 -> 2.1 -> 1.2 -> 2.2 или 2.2 -> 1.1 -> 2.1 -> 1.2). 
 
@@ -49,7 +62,39 @@ def show_rules():
 
 Игрок может нарушать правила бросания карт, но если это заметит противник, то команде игрока начисляется 3 очка
         """
-    )
+
+MENU_TEXT = """Карточная игра Шама (6♣)
+    МЕНЮ
+    1. Новая игра
+    2. Правила
+    3. Выход
+            """
+
+# Очистка экрана и истории прокрутки терминала перед выводом результата хода
+CLEAR_SCREEN = "\033c\033[3J"
+
+# Приглашения для ввода имен в порядке мест за столом (PLAYER_POSITIONS)
+PLAYER_NAME_PROMPTS = (
+    "Введите имя первого игрока первой команды\n",
+    "Введите имя второго игрока первой команды\n",
+    "Введите имя первого игрока второй команды\n",
+    "Введите имя второго игрока второй команды\n",
+)
+
+def read_command(prompt=''):
+    """Запрашивает команду у пользователя.
+    
+    Args:
+        prompt: Текст приглашения
+        
+    Returns:
+        str: Введенная команда без пробелов по краям в нижнем регистре
+    """
+    return input(prompt).strip().lower()
+
+def show_rules():
+    """Выводит правила игры одним вызовом print."""
+    print(RULES_TEXT)
 
 def show_menu():
     """Отображает главное меню игры и обрабатывает выбор пользователя.
@@ -62,12 +107,7 @@ def show_menu():
     Returns:
         int: Код выбранной опции меню (1, 2, 3) или 0 при некорректном вводе
     """
-    print("""Карточная игра Шама (6♣)
-    МЕНЮ
-    1. Новая игра
-    2. Правила
-    3. Выход
-            """)
+    print(MENU_TEXT)
     try:
         input_comand = input("Введите число для выбора действия меню\n")
         return int(input_comand)
@@ -75,7 +115,7 @@ def show_menu():
         print("Нужно ввести число")
         return 0
 
-def show_hand(hand):
+def show_hand(hand, title=None):
     """Отображает карты в руке игрока.
     
     Выводит карты с нумерацией для удобства выбора,
@@ -83,17 +123,16 @@ def show_hand(hand):
     
     Args:
         hand: Список карт в руке игрока
+        title: Заголовок, выводимый перед картами тем же вызовом print
     """
-    card_iter = iter(hand)
-    i = 0
-    while True:
-        i += 1
-        p_end = ' || ' if i % 3 else '\n'
-        try:
-            print(f"{i}: {next(card_iter)}", end=p_end)
-        except StopIteration:
-            print()
-            break
+    hand = list(hand)
+    rows = [
+        " || ".join(f"{i}: {card}" for i, card in enumerate(hand[k:k + 3], start=k + 1))
+        for k in range(0, len(hand), 3)
+    ]
+    if title is not None:
+        rows.insert(0, title)
+    print("\n".join(rows))
 
 def show_state(state):
     """Отображает текущее состояние игры.
@@ -104,16 +143,16 @@ def show_state(state):
     Args:
         state: Текущее состояние игры (объект MatchState)
     """
+    players = state.players
     print(f"""
 Статус игры:
-{state.players[GameConstants.PLAYER_1_1]} и {state.players[GameConstants.PLAYER_1_2]} - счет: {state.match_scores[GameConstants.TEAM_1]}
-{state.players[GameConstants.PLAYER_2_1]} и {state.players[GameConstants.PLAYER_2_2]} - счет: {state.match_scores[GameConstants.TEAM_2]}
-""")
-    print(f"Козырь: {GameConstants.SUIT_SYMBOLS[state.trump]}, хвалил {state.players[state.first_player_index]}")
-    print(f"Номер хода: {state.current_turn}")
-    print(f"Карты на столе:", end=' ')
-    print(state.show_table())
-    print(f"Сейчас ходит: {state.players[state.current_player_index]}", end=' ')
+{players[GameConstants.PLAYER_1_1]} и {players[GameConstants.PLAYER_1_2]} - счет: {state.match_scores[GameConstants.TEAM_1]}
+{players[GameConstants.PLAYER_2_1]} и {players[GameConstants.PLAYER_2_2]} - счет: {state.match_scores[GameConstants.TEAM_2]}
+
+Козырь: {GameConstants.SUIT_SYMBOLS[state.trump]}, хвалил {players[state.first_player_index]}
+Номер хода: {state.current_turn}
+Карты на столе: {state.show_table()}
+Сейчас ходит: {players[state.current_player_index]}""", end=' ')
 
 def create_match():
     """Создает новый матч игры.
@@ -123,21 +162,20 @@ def create_match():
     Returns:
         tuple: (status, state) - статус состояния, объект состояния игры
     """
-    player_name_11 = input("Введите имя первого игрока первой команды\n")
-    player_name_12 = input("Введите имя второго игрока первой команды\n")
-    player_name_21 = input("Введите имя первого игрока второй команды\n")
-    player_name_22 = input("Введите имя второго игрока второй команды\n")
+    player_names = [input(prompt) for prompt in PLAYER_NAME_PROMPTS]
     state = MatchState()
     try:
-        state.add_player(GameConstants.PLAYER_1_1, Player(1, player_name_11))
-        state.add_player(GameConstants.PLAYER_1_2, Player(2, player_name_12))
-        state.add_player(GameConstants.PLAYER_2_1, Player(3, player_name_21))
-        state.add_player(GameConstants.PLAYER_2_2, Player(4, player_name_22))
-        if state.status == GameConstants.Status.PLAYERS_ADDED:
+        for player_id, (player_index, player_name) in enumerate(
+                zip(GameConstants.PLAYER_POSITIONS, player_names), start=1):
+            state.add_player(player_index, Player(player_id, player_name))
+        # Состав команд не меняется до конца матча, поэтому строки собираются один раз
+        state.team1_header = f"{state.players[GameConstants.PLAYER_1_1]} и {state.players[GameConstants.PLAYER_1_2]}"
+        state.team2_header = f"{state.players[GameConstants.PLAYER_2_1]} и {state.players[GameConstants.PLAYER_2_2]}"
+        if state.status == Status.PLAYERS_ADDED:
             print(f"""
 Игроки в игре:
-Команда 1 - {state.players[GameConstants.PLAYER_1_1]} и {state.players[GameConstants.PLAYER_1_2]}
-Команда 2 - {state.players[GameConstants.PLAYER_2_1]} и {state.players[GameConstants.PLAYER_2_2]}
+Команда 1 - {state.team1_header}
+Команда 2 - {state.team2_header}
 Чтобы начать игру введите `s`, чтобы вернуться в меню - `m`
             """)
         return state.status, state
@@ -155,7 +193,7 @@ def handle_menu_selection(status_code, state):
     Returns:
         tuple: (status_code, state) - обновленные код состояния и объект игры
     """
-    menu_choice = show_menu() if status_code != GameConstants.Status.PLAYERS_ADDED.value else status_code
+    menu_choice = show_menu() if status_code != PLAYERS_ADDED_CODE else status_code
     
     if menu_choice == 3:  # Выход
         return -100, state
@@ -167,32 +205,30 @@ def handle_menu_selection(status_code, state):
         return status.value, state
     return status_code, state
 
-def handle_trump_selection(engine, state, first_player):
+def handle_trump_selection(engine, state):
     """Обрабатывает выбор козыря игроком с шамой.
     
     Args:
         engine: Игровой движок
         state: Объект состояния игры
-        first_player: Игрок с шамой
         
     Returns:
         GameConstants.Status: Обновленный статус
     """
+    first_player = state.players[state.first_player_index]
     print(f"Игрок с шамой: {first_player}")
-    input_command = input(
+    input_command = read_command(
         f"Показать карты игрока {first_player}\n"
         f"y - да, re - перераздача, f - завершить игру и выйти в меню\n"
-    ).lower()
+    )
 
     if input_command == 'y':
-        print(first_player.get_hand())
+        show_hand(first_player.get_hand(), 'Ваши карты:')
         suit_choice = int(input("Выберите козырь:\n1 - '♣', 2 - '♠', 3 - '♥', 4 - '♦'\n"))
-        suits = [GameConstants.CLUBS, GameConstants.SPADES, GameConstants.HEARTS, GameConstants.DIAMONDS]
         try:
-            suit = suits[suit_choice - 1]
+            suit = TRUMP_SUITS[suit_choice - 1]
             status, player_name, trump = engine.set_trump_by_player(state.first_player_index, suit)
-            print("\033c\033[3J", end="")
-            print(f"Игрок: {player_name} выбрал козырь: {GameConstants.SUIT_SYMBOLS[trump]}")
+            print(f"{CLEAR_SCREEN}Игрок: {player_name} выбрал козырь: {GameConstants.SUIT_SYMBOLS[trump]}")
             return status
         except ValueError as e:
             print(f"Статус: {state.status_code}, Ошибка: {e}")
@@ -200,12 +236,8 @@ def handle_trump_selection(engine, state, first_player):
         except IndexError:
             print("Некорректный выбор масти")
             return state.status
-    elif input_command == 're':
-        state.set_status(GameConstants.Status.PLAYERS_ADDED)
-        return state.status
-    elif input_command == 'f':
-        state.set_status(GameConstants.Status.GAME_FINISHED)
-        return state.status
+    elif input_command in TRUMP_EXIT_COMMANDS:
+        state.set_status(TRUMP_EXIT_COMMANDS[input_command])
     
     return state.status
 
@@ -220,21 +252,19 @@ def handle_player_turn(engine, state):
         GameConstants.Status: Обновленный статус
     """
     print(f"Ходит игрок: {state.players[state.current_player_index]}")
-    input_command = input(
+    input_command = read_command(
         f"Показать карты игрока {state.players[state.current_player_index]}\n"
         f"y - да, f - завершить игру и выйти в меню\n"
-    ).lower()
+    )
     
     if input_command == 'y':
         show_state(state)
-        print('Ваши карты:')
-        show_hand(state.players[state.current_player_index].get_hand())
+        show_hand(state.players[state.current_player_index].get_hand(), 'Ваши карты:')
         try:
             card_choice = int(input("Выберите номер карты для хода\n"))
             try:
                 status, player, card = engine.play_turn(state.current_player_index, card_choice - 1)
-                print("\033c\033[3J", end="")
-                print(f"Игрок {player} сыграл: {card}")
+                print(f"{CLEAR_SCREEN}Игрок {player} сыграл: {card}")
                 return status
             except InvalidPlayerAction as e:
                 print(e)
@@ -243,8 +273,8 @@ def handle_player_turn(engine, state):
             print("Нужно ввести число")
             return state.status
     elif input_command == 'f':
-        state.set_status(GameConstants.Status.GAME_FINISHED)
-        return GameConstants.Status.GAME_FINISHED
+        state.set_status(Status.GAME_FINISHED)
+        return Status.GAME_FINISHED
         
     return state.status
 
@@ -259,23 +289,96 @@ def handle_new_deal(engine, state):
         GameConstants.Status: Обновленный статус
         int: Обновленный код состояния
     """
-    input_command = input(f"Начать новую раздачу\ny - да, f - завершить игру и выйти в меню\n").lower()
+    input_command = read_command("Начать новую раздачу\ny - да, f - завершить игру и выйти в меню\n")
     
     if input_command == 'y':
-        print(f"Новая раздача!")
-        team1_players = f"{state.players[GameConstants.PLAYER_1_1]} и {state.players[GameConstants.PLAYER_1_2]}"
-        team2_players = f"{state.players[GameConstants.PLAYER_2_1]} и {state.players[GameConstants.PLAYER_2_2]}"
         team1_score = state.match_scores[GameConstants.TEAM_1]
         team2_score = state.match_scores[GameConstants.TEAM_2]
-        print(f"Счет: {team1_players} | {team1_score}-{team2_score} | {team2_players}")
+        print(f"Новая раздача!\nСчет: {state.team1_header} | {team1_score}-{team2_score} | {state.team2_header}")
         status = engine.start_game()
         return status
     elif input_command == 'f':
-        state.set_status(GameConstants.Status.GAME_FINISHED)
+        state.set_status(Status.GAME_FINISHED)
         return state.status
     
     return state.status
 
+def handle_deal(engine, state):
+    """Раздает карты в начале игры.
+    
+    Args:
+        engine: Игровой движок
+        state: Объект состояния игры
+        
+    Returns:
+        GameConstants.Status: Обновленный статус
+    """
+    return engine.start_game()
+
+def handle_trick(engine, state):
+    """Обрабатывает ходы игроков до завершения кона.
+    
+    Args:
+        engine: Игровой движок
+        state: Объект состояния игры
+        
+    Returns:
+        GameConstants.Status: Обновленный статус
+    """
+    status = state.status
+    while state.status != Status.TRICK_COMPLETED:
+        status = handle_player_turn(engine, state)
+        if status == Status.GAME_FINISHED:
+            break
+    return status
+
+def handle_trick_completed(engine, state):
+    """Завершает кон и выводит, кто забрал взятку.
+    
+    Args:
+        engine: Игровой движок
+        state: Объект состояния игры
+        
+    Returns:
+        GameConstants.Status: Обновленный статус
+    """
+    table = state.show_table()  # Стол очищается при завершении кона
+    status, winning_card, winning_player_index, trick_points = engine.complete_turn()
+    print(f"Карты на столе: {table}\n"
+          f"Взятку забрал игрок {state.players[winning_player_index]} "
+          f"картой {winning_card}! Начислили: {trick_points}")
+    return status
+
+def handle_game_completed(engine, state):
+    """Подводит итоги раздачи и начисляет очки проигравшей команде.
+    
+    Args:
+        engine: Игровой движок
+        state: Объект состояния игры
+        
+    Returns:
+        GameConstants.Status: Обновленный статус
+    """
+    status, scores, losing_team, losing_points, _ = engine.complete_game()
+    print(f"""Раздача завершилась!
+    Хвалил игрок {state.players[state.first_player_index]}, счет: {state.team1_header} | {scores[GameConstants.TEAM_1]}-{scores[GameConstants.TEAM_2]} | {state.team2_header}
+    Начислили очки ({losing_points}) для {state.players[losing_team + 1]} и {state.players[losing_team + 2]}""")
+    return status
+
+# Обработчики игрового цикла по текущему статусу
+STATUS_HANDLERS = {
+    Status.PLAYERS_ADDED: handle_deal,
+    Status.WAITING_TRUMP: handle_trump_selection,
+    Status.NEW_DEAL_READY: handle_new_deal,
+    Status.TRUMP_SELECTED: handle_trick,
+    Status.PLAYING_CARDS: handle_trick,
+    Status.PLAYED_CARD_1: handle_trick,
+    Status.PLAYED_CARD_2: handle_trick,
+    Status.PLAYED_CARD_3: handle_trick,
+    Status.TRICK_COMPLETED: handle_trick_completed,
+    Status.GAME_COMPLETED: handle_game_completed,
+}
+
 def main(status_code, state):
     """Основная функция игрового процесса.
     
@@ -293,8 +396,8 @@ def main(status_code, state):
     if status_code == -100 or state is None:
         return status_code, state
     # Обработка начала игры
-    if state.status == GameConstants.Status.PLAYERS_ADDED:
-        input_command = input()
+    if state.status == Status.PLAYERS_ADDED:
+        input_command = read_command()
         if input_command == 's':  # Начать игру
             engine = GameEngine(state)
             status = state.status
@@ -302,58 +405,21 @@ def main(status_code, state):
             # losing_team = None
             
             # Основной игровой цикл
-            while state.status not in (GameConstants.Status.MATCH_COMPLETED, GameConstants.Status.GAME_FINISHED):
-                # Обработка разных состояний игры
-                if state.status == GameConstants.Status.PLAYERS_ADDED:
-                    # Начало игры (раздача карт)
-                    status = engine.start_game()
-                    
-                elif state.status == GameConstants.Status.WAITING_TRUMP:
-                    # Выбор козыря
-                    status = handle_trump_selection(engine, state, 
-                                                        state.players[state.first_player_index])
-                    
-                elif state.status == GameConstants.Status.NEW_DEAL_READY:
-                    # Новая раздача
-                    status = handle_new_deal(engine, state)
-                    
-                # Игровой процесс
-                elif GameConstants.Status.TRUMP_SELECTED.value <= status.value < GameConstants.Status.TRICK_COMPLETED.value:
-                    # Обработка ходов игроков
-                    while state.status != GameConstants.Status.TRICK_COMPLETED:
-                        status = handle_player_turn(engine, state)
-                        if status == GameConstants.Status.GAME_FINISHED:
-                            # game_finished = True
-                            break
-                    
-                # Завершение кона
-                elif state.status == GameConstants.Status.TRICK_COMPLETED:
-                    print(f"Карты на столе:", end=' ')
-                    print(state.show_table())
-                    status, winning_card, winning_player_index, trick_points = engine.complete_turn()
-                    print(f"Взятку забрал игрок {state.players[winning_player_index]} "
-                          f"картой {winning_card}! Начислили: {trick_points}")
-                
-                # Завершение игры
-                elif state.status == GameConstants.Status.GAME_COMPLETED:
-                    status, scores, losing_team, losing_points, _ = engine.complete_game()
-                    team1_players = f"{state.players[GameConstants.PLAYER_1_1]} и {state.players[GameConstants.PLAYER_1_2]}"
-                    team2_players = f"{state.players[GameConstants.PLAYER_2_1]} и {state.players[GameConstants.PLAYER_2_2]}"
-                    
-                    print(f"""Раздача завершилась!
-    Хвалил игрок {state.players[state.first_player_index]}, счет: {team1_players} | {scores[GameConstants.TEAM_1]}-{scores[GameConstants.TEAM_2]} | {team2_players}
-    Начислили очки ({losing_points}) для {state.players[losing_team + 1]} и {state.players[losing_team + 2]}""")
+            while state.status not in LOOP_END_STATUSES:
+                status = STATUS_HANDLERS[state.status](engine, state)
             
             # Завершение матча, если одна из команд набрала 12+ очков
-            if status == GameConstants.Status.MATCH_COMPLETED:
+            if status == Status.MATCH_COMPLETED:
                 status = engine.complete_match()
+                # Проигравшая команда та, что первой набрала 12 очков
+                losing_team = GameConstants.TEAM_1 if state.match_scores[GameConstants.TEAM_1] >= 12 else GameConstants.TEAM_2
                 print(f"""Игра закончилась!
     {state.players[losing_team + 1]} и {state.players[losing_team + 2]} - проиграли(
     Счет: {state.match_scores[GameConstants.TEAM_1]}-{state.match_scores[GameConstants.TEAM_2]}\n""")
                 return state.status.value, state
         
-        elif input_command in ('m',):  # Вернуться в меню
-            state.set_status(GameConstants.Status.GAME_FINISHED)
+        elif input_command == 'm':  # Вернуться в меню
+            state.set_status(Status.GAME_FINISHED)
             return state.status.value, state
         else:
             print("Чтобы начать игру введите `s`, чтобы вернуться в меню - `m`\n")
@@ -12,20 +12,36 @@ import sys
 from datetime import datetime
 import logging
 import asyncio
+import time
+from collections import OrderedDict
+from uuid import uuid4
 
 from telegram import Bot, Update, InlineKeyboardMarkup, InlineKeyboardButton
 from telegram.ext import (
-    Application, CommandHandler, MessageHandler, CallbackQueryHandler,
+    Application, BaseUpdateProcessor, CommandHandler, MessageHandler, CallbackQueryHandler,
     filters, ContextTypes
 )
-from telegram.error import TelegramError
+from telegram.error import TelegramError, RetryAfter, NetworkError, BadRequest, TimedOut
 from dotenv import load_dotenv
 
+try:
+    import uvloop  # Более быстрый цикл событий на libuv (нет под Windows)
+except ImportError:
+    uvloop = None
+
 # Импорт модулей игры
 from core import GameEngine, MatchState, Player, GameException, InvalidPlayerAction
 from constants import GameConstants
 from storage_factory import StorageFactory
 
+# Короткие имена для часто используемых констант
+Status = GameConstants.Status
+SUIT_SYMBOLS = GameConstants.SUIT_SYMBOLS
+SUIT_NAMES = GameConstants.SUIT_NAMES
+TEAM_1 = GameConstants.TEAM_1
+TEAM_2 = GameConstants.TEAM_2
+PLAYER_TEAMS = GameConstants.PLAYER_TEAMS
+
 # Загружаем переменные окружения из .env файла
 load_dotenv()
 
@@ -43,16 +59,128 @@ logging.getLogger('telegram').setLevel(logging.INFO)
 
 # Глобальные переменные
 BOT_TOKEN = os.environ.get("TELEGRAM_BOT_TOKEN")
-WAITING_MATCHES = {}  # Хранит ожидающие игры {match_id: {creator_id, players: {}, timestamp, game_id}}
-ACTIVE_MATCHES = {}  # Хранит активные игры {match_id: MatchState}
-HOLDING_MATCHES = {}  # Хранит приостановленные игры {match_id: MatchState}
-MATCH_ENGINES = {}  # Игровые движки {match_id: GameEngine}
-PLAYER_TO_GAME = {} # Хранит игроков в игре{player_id: match_id}
+WEBHOOK_URL = os.environ.get("WEBHOOK_URL")  # Публичный HTTPS-адрес бота, без него используется опрос
+WEBHOOK_LISTEN = os.environ.get("WEBHOOK_LISTEN", "0.0.0.0")  # Адрес, на котором принимаются обновления
+WEBHOOK_PORT = int(os.environ.get("WEBHOOK_PORT", "8443"))  # Порт для приема обновлений
+WAITING_MATCHES = {}  # Хранит ожидающие игры {match_id: WaitingMatch}
+ACTIVE_MATCHES = {}  # Хранит активные игры {match_id: GameEngine}, состояние матча - engine.state
+HOLDING_MATCHES = {}  # Хранит приостановленные игры {match_id: MatchState}; пауза пока не реализована, словарь только очищается
+PLAYER_TO_GAME = {} # Хранит игроков в игре {player_id: PlayerSeat}
+BOT_INFO = None  # Данные бота (telegram.User), запрашиваются один раз при запуске
+BOT = None  # Общий экземпляр Bot для рассылки сообщений игрокам
+PLAYER_CACHE = OrderedDict()  # LRU-кэш данных игроков {player_id: (player_data, timestamp)}
+PLAYER_CACHE_TTL = 300  # Время жизни записи в кэше игроков, секунды
+PLAYER_CACHE_SIZE = 10000  # Максимальное число записей в кэше игроков
+LOG_QUEUE = None  # Очередь событий для фоновой записи в хранилище
+LOG_BATCH_SIZE = 64  # Максимальное число событий в одной записи
+LOG_QUEUE_SIZE = 10000  # Максимальное число событий, ожидающих записи
+LOG_FLUSH_INTERVAL = 0.2  # Время накопления пачки событий, секунды
+WAITING_MATCH_TTL = 3600  # Время жизни неначатой игры, секунды
+STALE_SWEEP_INTERVAL = 300  # Период проверки устаревших игр, секунды
+MATCH_LOCKS = {}  # Блокировки матчей {match_id: asyncio.Lock}
+SEEN_CALLBACKS = OrderedDict()  # ID недавно обработанных callback-запросов {query_id: None}
+SEEN_CALLBACKS_SIZE = 4096  # Сколько последних ID callback-запросов помнить
+SEND_CONCURRENCY = 8  # Максимальное число одновременных запросов отправки сообщений
+SEND_RETRIES = 3  # Число попыток отправки сообщения при временных ошибках Telegram
+SEND_SEMAPHORE = asyncio.Semaphore(SEND_CONCURRENCY)  # Ограничение параллельных отправок
 
 # Инициализация хранилища
 storage = None
 
 
+class ChatOrderedUpdateProcessor(BaseUpdateProcessor):
+    """Обработчик очереди обновлений PTB.
+    
+    Обновления разных чатов обрабатываются параллельно, обновления
+    одного чата - строго по очереди в порядке поступления.
+    """
+    
+    def __init__(self, max_concurrent_updates: int = 256):
+        super().__init__(max_concurrent_updates)
+        self._chat_locks = {}  # {chat_id: asyncio.Lock}
+        self._chat_pending = {}  # {chat_id: число обновлений в работе}
+    
+    async def do_process_update(self, update, coroutine):
+        """Выполняет обработчик обновления под блокировкой его чата."""
+        chat = update.effective_chat if isinstance(update, Update) else None
+        if chat is None:
+            await coroutine
+            return
+        
+        chat_id = chat.id
+        lock = self._chat_locks.get(chat_id)
+        if lock is None:
+            lock = self._chat_locks[chat_id] = asyncio.Lock()
+        self._chat_pending[chat_id] = self._chat_pending.get(chat_id, 0) + 1
+        try:
+            async with lock:
+                await coroutine
+        finally:
+            # Удаляем блокировку, когда у чата не осталось обновлений
+            self._chat_pending[chat_id] -= 1
+            if not self._chat_pending[chat_id]:
+                del self._chat_pending[chat_id]
+                del self._chat_locks[chat_id]
+    
+    async def initialize(self):
+        pass
+    
+    async def shutdown(self):
+        pass
+
+class WaitingMatch:
+    """Игра, ожидающая игроков.
+    
+    Атрибуты:
+        creator_id (int): ID создателя игры
+        players (dict): Данные присоединившихся игроков {player_id: player_data},
+            словари из кэша игроков, только для чтения
+        player_lines (list): Готовые строки списка участников
+        team_1 (list): Строки игроков первой команды
+        team_2 (list): Строки игроков второй команды
+        teams_text (str): Готовый текст составов команд для сообщений
+        timestamp (float): Время создания игры (time.monotonic)
+        invite_link (str): Инвайт-ссылка для присоединения
+    """
+    
+    __slots__ = ('creator_id', 'players', 'player_lines', 'team_1', 'team_2', 'teams_text', 'timestamp', 'invite_link')
+    
+    def __init__(self, creator_id, player_data, invite_link):
+        self.creator_id = creator_id
+        self.players = {creator_id: player_data}
+        self.player_lines = [f"• {player_data['name']}"]
+        self.team_1 = [f"{player_data['name']} ({player_data['username']})"]
+        self.team_2 = []
+        self.teams_text = ""
+        self.timestamp = time.monotonic()
+        self.invite_link = invite_link
+        self.update_teams_text()
+    
+    def team(self, team):
+        """Возвращает список игроков команды 1 или 2."""
+        return self.team_1 if team == 1 else self.team_2
+    
+    def update_teams_text(self):
+        """Пересобирает текст составов команд, вызывается после изменения команд."""
+        self.teams_text = (f"Команда 1: {', '.join(self.team_1)}\n"
+                           f"Команда 2: {', '.join(self.team_2)}")
+
+class PlayerSeat:
+    """Место игрока в игре: ID матча, его статус и позиция за столом.
+    
+    Атрибуты:
+        match_id (str): ID матча
+        status (str): 'waiting' - игра ожидает игроков, 'active' - игра идет
+        position (int): Позиция за столом (11, 12, 21, 22) или None, пока команда не выбрана
+    """
+    
+    __slots__ = ('match_id', 'status', 'position')
+    
+    def __init__(self, match_id, position=None):
+        self.match_id = match_id
+        self.status = 'waiting'
+        self.position = position
+
 async def init_storage():
     """Инициализация хранилища данных."""
     global storage
@@ -66,6 +194,316 @@ async def init_storage():
         logger.error(f"Ошибка при инициализации хранилища данных: {e}")
         return False
 
+def log_event(player_id, username, event_type, event_data):
+    """Ставит событие в очередь на запись, не дожидаясь хранилища.
+    
+    Если хранилище не успевает за потоком событий и очередь заполнена,
+    событие отбрасывается с предупреждением, а не копится в памяти.
+    """
+    try:
+        LOG_QUEUE.put_nowait((player_id, username, event_type, event_data, datetime.now()))
+    except asyncio.QueueFull:
+        logger.warning(f"Очередь событий заполнена, событие {event_type} не записано")
+
+async def _flush_log_batch(batch):
+    """Записывает пачку событий в хранилище одним вызовом."""
+    try:
+        await storage.log_events_batch(batch)
+    except Exception as e:
+        logger.error(f"Ошибка при записи событий: {e}")
+
+async def _log_flusher():
+    """Фоновая задача: забирает события из очереди и пишет их пачками.
+    
+    Пачка записывается, когда набралось LOG_BATCH_SIZE событий или прошло
+    LOG_FLUSH_INTERVAL секунд с момента первого события в ней.
+    """
+    loop = asyncio.get_running_loop()
+    while True:
+        batch = [await LOG_QUEUE.get()]
+        deadline = loop.time() + LOG_FLUSH_INTERVAL
+        try:
+            while len(batch) < LOG_BATCH_SIZE:
+                timeout = deadline - loop.time()
+                if timeout <= 0:
+                    break
+                try:
+                    batch.append(await asyncio.wait_for(LOG_QUEUE.get(), timeout))
+                except asyncio.TimeoutError:
+                    break
+        finally:
+            # При остановке тоже записываем уже собранную пачку
+            await _flush_log_batch(batch)
+
+def _get_bot():
+    """Возвращает общий экземпляр Bot.
+    
+    После запуска это application.bot с уже открытым пулом соединений,
+    до запуска экземпляр создается один раз при первом обращении.
+    """
+    global BOT
+    if BOT is None:
+        BOT = Bot(BOT_TOKEN)
+    return BOT
+
+async def _send_message(bot, chat_id, text, **kwargs):
+    """Отправляет сообщение с ограничением параллельности и повторами.
+    
+    При превышении лимита Telegram (429) ждет указанное сервером время,
+    при сетевых ошибках повторяет отправку с экспоненциальной задержкой.
+    BadRequest (ошибка запроса, например "Chat not found") и TimedOut
+    не повторяются: первая постоянна, а после таймаута сообщение могло
+    уже дойти, и повтор продублировал бы его. Эти ошибки и ошибку
+    последней попытки пробрасывает дальше.
+    """
+    async with SEND_SEMAPHORE:
+        for attempt in range(SEND_RETRIES):
+            try:
+                return await bot.send_message(chat_id=chat_id, text=text, **kwargs)
+            except RetryAfter as e:
+                if attempt == SEND_RETRIES - 1:
+                    raise
+                await asyncio.sleep(e.retry_after)
+            except (BadRequest, TimedOut):
+                # Подклассы NetworkError в PTB, но повторять их нельзя
+                raise
+            except NetworkError:
+                if attempt == SEND_RETRIES - 1:
+                    raise
+                await asyncio.sleep(2 ** attempt)
+
+def _match_lock(match_id):
+    """Возвращает блокировку матча, создавая ее при первом обращении.
+    
+    Обновления обрабатываются параллельно, поэтому изменения состояния
+    одного матча выполняются под его блокировкой.
+    """
+    lock = MATCH_LOCKS.get(match_id)
+    if lock is None:
+        lock = MATCH_LOCKS[match_id] = asyncio.Lock()
+    return lock
+
+def _release_match_lock(match_id):
+    """Удаляет блокировку матча, если матч уже удален и блокировка свободна.
+    
+    Вызывается после выхода из-под блокировки: матч мог завершиться
+    или быть удален, пока обработчик ее удерживал.
+    """
+    if match_id in WAITING_MATCHES or match_id in ACTIVE_MATCHES:
+        return
+    lock = MATCH_LOCKS.get(match_id)
+    if lock is not None and not lock.locked():
+        del MATCH_LOCKS[match_id]
+
+def _cleanup_match(match_id):
+    """Удаляет все записи о матче из глобальных словарей.
+    
+    Вызывается при завершении матча и при удалении устаревшей
+    неначатой игры, чтобы словари не росли за время работы бота.
+    Удерживаемую блокировку матча не трогает: ее удалит
+    _release_match_lock, когда обработчик освободит ее.
+    """
+    engine = ACTIVE_MATCHES.pop(match_id, None)
+    holding_state = HOLDING_MATCHES.pop(match_id, None)
+    match_state = engine.state if engine else holding_state
+    lock = MATCH_LOCKS.get(match_id)
+    if lock is not None and not lock.locked():
+        del MATCH_LOCKS[match_id]
+    waiting = WAITING_MATCHES.pop(match_id, None)
+    
+    player_ids = set(waiting.players) if waiting else set()
+    if match_state:
+        player_ids.update(match_state.position_by_id)
+    for player_id in player_ids:
+        game = PLAYER_TO_GAME.get(player_id)
+        if game and game.match_id == match_id:
+            del PLAYER_TO_GAME[player_id]
+
+async def _sweep_stale_matches():
+    """Фоновая задача: удаляет игры, которые слишком долго ждут игроков."""
+    while True:
+        await asyncio.sleep(STALE_SWEEP_INTERVAL)
+        deadline = time.monotonic() - WAITING_MATCH_TTL
+        stale = [match_id for match_id, match in WAITING_MATCHES.items() if match.timestamp < deadline]
+        for match_id in list(stale):
+            # Игру, к которой сейчас присоединяются, проверим при следующем обходе
+            lock = MATCH_LOCKS.get(match_id)
+            if lock is not None and lock.locked():
+                stale.remove(match_id)
+                continue
+            _cleanup_match(match_id)
+        if stale:
+            logger.info(f"Удалено устаревших игр в ожидании: {len(stale)}")
+
+async def cached_get_or_create_player(player_id, username, first_name):
+    """Получает данные игрока с кэшированием в памяти.
+    
+    Повторные команды одного пользователя в пределах PLAYER_CACHE_TTL
+    не обращаются к хранилищу. Запись сбрасывается, если пользователь
+    сменил имя или username в Telegram. При переполнении кэша вытесняются
+    давно не использованные записи.
+    """
+    now = time.monotonic()
+    entry = PLAYER_CACHE.get(player_id)
+    if entry:
+        player_data, cached_at = entry
+        if (now - cached_at < PLAYER_CACHE_TTL
+                and (player_data['username'] or '') == (username or '')
+                and player_data['name'] == first_name):
+            PLAYER_CACHE.move_to_end(player_id)
+            return player_data
+    
+    player_data = await storage.get_or_create_player(player_id, username, first_name)
+    if player_data:
+        PLAYER_CACHE[player_id] = (player_data, now)
+        PLAYER_CACHE.move_to_end(player_id)
+        if len(PLAYER_CACHE) > PLAYER_CACHE_SIZE:
+            PLAYER_CACHE.popitem(last=False)
+    return player_data
+
+# Клавиатура выбора команды одинакова для всех игроков, создаем ее один раз
+TEAM_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("Команда 1", callback_data="team_1"),
+        InlineKeyboardButton("Команда 2", callback_data="team_2")
+    ]
+])
+
+async def _join_via_link(update, context, match_id, player_data):
+    """Присоединяет игрока к игре по инвайт-ссылке."""
+    player_id = update.effective_user.id
+    first_name = update.effective_user.first_name
+    username = update.effective_user.username
+    
+    # Обычно игра по ссылке ожидает игроков, поэтому проверяем ожидающие первыми
+    match = WAITING_MATCHES.get(match_id)
+    
+    # Игра по ссылке уже идет
+    if match is None and match_id in ACTIVE_MATCHES:
+        game = PLAYER_TO_GAME.get(player_id)
+        if game is not None and game.match_id == match_id:
+            await update.message.reply_text(
+                f"Привет, {first_name}!\n"
+                f"Вы уже состоите в этой игре и она уже идет.\n"
+            )
+        else:
+            await update.message.reply_text(
+                f"Привет, {first_name}!\n"
+                f"К сожалению, игра по этой ссылке уже идет.\n"
+                f"Вы можете создать новую игру командой /create_game."
+            )
+        return
+    
+    # Игра не найдена
+    if match is None:
+        await update.message.reply_text(
+            f"Привет, {first_name}!\n"
+            f"К сожалению, игра по этой ссылке уже не активна или завершена.\n"
+            f"Вы можете создать новую игру командой /create_game."
+        )
+        return
+    
+    # Игрок уже присоединился
+    if player_id in match.players:
+        await update.message.reply_text(
+            f"Привет, {first_name}! Вы уже присоединились к этой игре.\n"
+            f"Ожидайте начала игры."
+        )
+        return
+    
+    # Стол заполнен (4 игрока)
+    if len(match.players) >= 4:
+        await update.message.reply_text(
+            f"Привет, {first_name}!\n"
+            f"К сожалению, в игре уже набралось максимальное количество игроков (4)."
+        )
+        return
+    
+    if not player_data:
+        await update.message.reply_text("Произошла ошибка при создании игрока. Попробуйте еще раз.")
+        return
+    
+    # Добавляем игрока
+    match.players[player_id] = player_data
+    match.player_lines.append(f"• {player_data['name']}")
+    game = PLAYER_TO_GAME[player_id] = PlayerSeat(match_id)
+    # Логируем присоединение к игре
+    log_event(
+        player_id, 
+        username,
+        "join_match", 
+        match_id
+    )
+    
+    # Отправляем сообщение о выборе команды, если есть неполные команды
+    if len(match.team_1) < 2 and len(match.team_2) < 2:
+        message_text = f"Выберите команду:\n{match.teams_text}\n\n"
+        await _send_message(context.bot, player_id, message_text, reply_markup=TEAM_KEYBOARD)
+        return
+    
+    # Одна из команд заполнена, сажаем игрока в свободную
+    _, position = _take_seat(match, 1, f'{first_name} ({username})')
+    game.position = position
+
+    await _announce_join(context.bot, match_id, match, player_id, first_name)
+
+async def _broadcast(bot, chat_ids, text, **kwargs):
+    """Отправляет одно сообщение нескольким чатам параллельно.
+    
+    Ошибка отправки в один чат не прерывает отправку в остальные,
+    она только записывается в лог.
+    """
+    chat_ids = list(chat_ids)
+    results = await asyncio.gather(*(
+        _send_message(bot, chat_id, text, **kwargs)
+        for chat_id in chat_ids
+    ), return_exceptions=True)
+    for chat_id, result in zip(chat_ids, results):
+        if isinstance(result, Exception):
+            logger.error(f"Ошибка при отправке сообщения в чат {chat_id}: {result}")
+
+def _take_seat(match, team, label):
+    """Сажает игрока в команду ожидающей игры.
+    
+    Вызывается под блокировкой матча, поэтому два игрока не могут
+    одновременно занять одно место.
+    
+    Args:
+        match: Ожидающая игра из WAITING_MATCHES
+        team: Желаемая команда (1 или 2), если она заполнена - игрок попадает в другую
+        label: Строка игрока для списка команды
+        
+    Returns:
+        tuple: (team, position) - команда и место игрока за столом
+    """
+    if len(match.team(team)) >= 2:
+        team = 3 - team
+    members = match.team(team)
+    position = team * 10 + len(members) + 1  # 11, 12, 21, 22
+    members.append(label)
+    match.update_teams_text()
+    return team, position
+
+async def _announce_join(bot, match_id, match, player_id, first_name):
+    """Сообщает участникам о новом игроке и начинает игру, когда их 4."""
+    players = match.players
+    await _broadcast(
+        bot,
+        (chat_id for chat_id in players if chat_id > 0),
+        f"🎮 {first_name} присоединился к игре!\n\n"
+        f"Текущие участники ({len(players)}/4):\n"
+        f"{match.teams_text}\n\n"
+    )
+    
+    # Если все 4 игрока заняли места в командах, начинаем игру
+    if len(match.team_1) + len(match.team_2) == 4:
+        # Игра начинается, даже если уведомление не удалось отправить
+        try:
+            await _send_message(bot, player_id, "Набралось 4 игрока! Игра начинается...")
+        except Exception as e:
+            logger.error(f"Ошибка при отправке сообщения в чат {player_id}: {e}")
+        await start_game(bot, player_id, match_id, players)
+
 async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик команды /start."""
     logger.info(f"Получена команда /start от пользователя {update.effective_user.username}")
@@ -74,7 +512,7 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     username = update.effective_user.username
     
     # Сохраняем или обновляем данные игрока
-    player_data = await storage.get_or_create_player(
+    player_data = await cached_get_or_create_player(
         player_id, 
         username,
         first_name,
@@ -88,104 +526,19 @@ async def start_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> N
     # Проверяем, не является ли это присоединением к игре через инвайт-ссылку
     if context.args and context.args[0].startswith('join_'):
         match_id = context.args[0][5:]  # Получаем ID матча из аргумента
-            
-        # Проверяем, активна ли еще игра
-        if match_id in WAITING_MATCHES:
-            # Проверяем, не присоединился ли игрок уже
-            if player_id in WAITING_MATCHES[match_id]['players']:
-                await update.message.reply_text(
-                    f"Привет, {first_name}! Вы уже присоединились к этой игре.\n"
-                    f"Ожидайте начала игры."
-                )
-            # Проверяем, не заполнен ли стол (4 игрока)
-            elif len(WAITING_MATCHES[match_id]['players']) >= 4:
-                await update.message.reply_text(
-                    f"Привет, {first_name}!\n"
-                    f"К сожалению, в игре уже набралось максимальное количество игроков (4)."
-                )
-            else:
-                # Добавляем игрока
-                WAITING_MATCHES[match_id]['players'][player_id] = player_data.copy()
-                PLAYER_TO_GAME[player_data['id']] = {
-                    'id':match_id,
-                    'status': 'waiting',
-                    'position': None
-                }
-                # Логируем присоединение к игре
-                await storage.log_event(
-                    player_id, 
-                    username,
-                    "join_match", 
-                    match_id
-                )
-                # Отправляем сообщение о выборе комамнды, если есть не полные команды
-                if len(WAITING_MATCHES[match_id]['team_1']) < 2 and len(WAITING_MATCHES[match_id]['team_2']) < 2:
-                    message_text = (f"Выберите команду:\n"
-                    f"Команда 1: {WAITING_MATCHES[match_id]['team_1']}\n"
-                    f"Команда 2: {WAITING_MATCHES[match_id]['team_2']}\n\n")
-                    keyboard = InlineKeyboardMarkup([
-                [
-                    InlineKeyboardButton("Команда 1", callback_data="team_1"),
-                    InlineKeyboardButton("Команда 2", callback_data="team_2")
-                ]
-            ])
-                    await context.bot.send_message(
-                        chat_id=player_id, 
-                        text=message_text,
-                        reply_markup=keyboard
-                    )
-                else:
-                    match_id = PLAYER_TO_GAME[player_id]['id']
-                    team = 1 if len(WAITING_MATCHES[match_id]['team_1']) < 2 else 2
-                    players_cnt = len(WAITING_MATCHES[match_id][f"team_{team}"])
-                    position = int(f"{team}{players_cnt + 1}")
-                    
-                    WAITING_MATCHES[match_id][f"team_{team}"].append(f'{first_name} ({username})')
-                    PLAYER_TO_GAME[player_id]['position'] = position
-
-                    # Получаем обновленный список игроков
-                    players = WAITING_MATCHES[match_id]['players']
-                    
-                    # Отправляем сообщения другим игрокам
-                    for chat_id in players:
-                        if chat_id > 0:
-                            await context.bot.send_message(
-                                chat_id=chat_id,
-                                text=f"🎮 {first_name} присоединился к игре!\n\n"
-                                        f"Текущие участники ({len(players)}/4):\n"
-                                        f"Команда 1: {WAITING_MATCHES[match_id]['team_1']}\n"
-                                        f"Команда 2: {WAITING_MATCHES[match_id]['team_2']}\n\n"
-                            )
-                    
-                    # Если набралось 4 игрока, начинаем игру
-                    if len(players) == 4:
-                        message = await context.bot.send_message(
-                            chat_id=chat_id,
-                            text="Набралось 4 игрока! Игра начинается..."
-                        )
-                        await start_game(message, match_id, players)
-
-            return
-        elif match_id in ACTIVE_MATCHES:
-            if player_id in PLAYER_TO_GAME and PLAYER_TO_GAME[player_id]['id'] == match_id:
-                await update.message.reply_text(
-                f"Привет, {first_name}!\n"
-                f"Вы уже состоите в этой игре и она уже идет.\n"
-            )
-            else:
-                await update.message.reply_text(
-                    f"Привет, {first_name}!\n"
-                    f"К сожалению, игра по этой ссылке уже идет.\n"
-                    f"Вы можете создать новую игру командой /create_game."
-                )
-            return
-        else:
-            await update.message.reply_text(
-                f"Привет, {first_name}!\n"
-                f"К сожалению, игра по этой ссылке уже не активна или завершена.\n"
-                f"Вы можете создать новую игру командой /create_game."
-            )
+        
+        # ID пришел от пользователя: для несуществующей игры блокировку не создаем,
+        # _join_via_link только сообщит, что игра не найдена
+        if match_id not in WAITING_MATCHES and match_id not in ACTIVE_MATCHES:
+            await _join_via_link(update, context, match_id, player_data)
             return
+        
+        async with _match_lock(match_id):
+            await _join_via_link(update, context, match_id, player_data)
+        
+        # Игра могла быть удалена, пока мы ждали блокировку
+        _release_match_lock(match_id)
+        return
     
     # Обычный старт бота
     await update.message.reply_text(
@@ -200,21 +553,21 @@ async def create_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE
     player_id = update.effective_user.id
     first_name = update.effective_user.first_name
     username = update.effective_user.username
-    bot_username = (await context.bot.get_me()).username
     
     # Проверяем, состоит ли игрок в активной или ожидающей игре игре
-    if player_id in PLAYER_TO_GAME:
+    game = PLAYER_TO_GAME.get(player_id)
+    if game is not None:
         await update.message.reply_text(f"Вы уже состоите в игре. \n"
                                         f"Покиньте или завершите ее, для создания новой игры")
         
 
         # Выводим инфу по активной игре
-        game_id = PLAYER_TO_GAME[player_id]['id']
-        game_status = PLAYER_TO_GAME[player_id]['status']
+        game_id = game.match_id
+        game_status = game.status
         if game_status == 'waiting':
-            players = WAITING_MATCHES[game_id]['players']
-            player_list = "\n".join([f"• {p_data['name']}" for p_data in players.values()])
-            invite_link = f"https://t.me/{bot_username}?start=join_{game_id}"
+            match = WAITING_MATCHES[game_id]
+            player_list = "\n".join(match.player_lines)
+            invite_link = match.invite_link
             await update.message.reply_text(
                 f"Ваша игра в ожидании игроков!\n\n"
                 f"Текущие участники:\n{player_list}\n\n"
@@ -225,17 +578,16 @@ async def create_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             )
             return
         else:
-            match_state = ACTIVE_MATCHES[game_id]
+            match_state = ACTIVE_MATCHES[game_id].state
+            match_scores = match_state.match_scores
             await update.message.reply_text(
                 f"Ваша игра уже идет!\n\n"
                 f"Статус игры:\n"
-                f"{match_state.players[GameConstants.PLAYER_1_1]} и "
-                f"{match_state.players[GameConstants.PLAYER_1_2]} - счет: "
-                f"{match_state.match_scores[GameConstants.TEAM_1]}\n"
-                f"{match_state.players[GameConstants.PLAYER_2_1]} и "
-                f"{match_state.players[GameConstants.PLAYER_2_2]} - счет: "
-                f"{match_state.match_scores[GameConstants.TEAM_2]}\n"
-                f"Козырь: {GameConstants.SUIT_SYMBOLS[match_state.trump]}, хвалил: "
+                f"{match_state.team1_header} - счет: "
+                f"{match_scores[TEAM_1]}\n"
+                f"{match_state.team2_header} - счет: "
+                f"{match_scores[TEAM_2]}\n"
+                f"Козырь: {match_state.trump_symbol}, хвалил: "
                 f"{match_state.players[match_state.first_player_index]}\n"
                 f"Номер хода: {match_state.current_turn}\n"
                 f"Карты на столе: {match_state.show_table()}\n"
@@ -243,37 +595,24 @@ async def create_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE
             return
     
     # Получаем данные игрока из хранилища
-    player_data = await storage.get_or_create_player(player_id, username, first_name)
+    player_data = await cached_get_or_create_player(player_id, username, first_name)
     if not player_data:
         await update.message.reply_text("Произошла ошибка при создании игрока. Попробуйте еще раз.")
         return
     
     # Генерируем уникальный ID для игры
-    import uuid
-    match_id = str(int(datetime.now().timestamp())) + str(uuid.uuid4())[:8]
+    match_id = uuid4().hex[:12]
+    
+    # Инвайт-ссылка неизменна, формируем ее один раз при создании игры
+    invite_link = f"https://t.me/{BOT_INFO.username}?start=join_{match_id}"
     
     # Создаем новую игру в ожидании игроков
-    WAITING_MATCHES[match_id] = {
-        'creator_id': player_id,
-        'players': {
-            player_id: player_data.copy()
-        },
-        'team_1': [f"{player_data['name']} ({player_data['username']})"],
-        'team_2': [],
-        'timestamp': asyncio.get_event_loop().time(),
-    }
-    PLAYER_TO_GAME[player_id] = {
-        'id': match_id,
-        'status': 'waiting',
-        'position': GameConstants.PLAYER_1_1
-    }
-    
-
-    # Создаем инвайт-ссылку
-    invite_link = f"https://t.me/{bot_username}?start=join_{match_id}"
+    WAITING_MATCHES[match_id] = WaitingMatch(player_id, player_data, invite_link)
+    PLAYER_TO_GAME[player_id] = PlayerSeat(match_id, GameConstants.PLAYER_1_1)
+
     
     # Логируем создание игры
-    await storage.log_event(
+    log_event(
         player_id, 
         username,
         "create_game", 
@@ -290,8 +629,15 @@ async def create_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE
         f"/start join_{match_id}"
     )
             
-async def start_game(message, match_id, players):
-    """Начинает новую игру после того, как собрались 4 игрока."""
+async def start_game(bot, chat_id, match_id, players):
+    """Начинает новую игру после того, как собрались 4 игрока.
+    
+    Args:
+        bot: Экземпляр Bot для отправки сообщений
+        chat_id: Чат, в который отправляется сообщение о начале игры
+        match_id: ID ожидающей игры
+        players: Данные игроков ожидающей игры {player_id: player_data}
+    """
     logger.info(f"Начинаем новую игру {match_id}")
     
     try:
@@ -302,8 +648,14 @@ async def start_game(message, match_id, players):
         # Добавляем игроков в состояние матча
         for player_data in players_data:
             player = Player(player_data['id'], player_data['name'])
-            match_state.add_player(PLAYER_TO_GAME[player_data['id']]['position'], player)
-            PLAYER_TO_GAME[player_data['id']]['status'] = 'active'
+            game = PLAYER_TO_GAME[player.id]
+            match_state.add_player(game.position, player)
+            game.status = 'active'
+            
+        # Составы команд не меняются до конца матча, формируем их строки один раз
+        seats = match_state.players
+        match_state.team1_header = f"{seats[GameConstants.PLAYER_1_1]} и {seats[GameConstants.PLAYER_1_2]}"
+        match_state.team2_header = f"{seats[GameConstants.PLAYER_2_1]} и {seats[GameConstants.PLAYER_2_2]}"
             
         # Создаем игровой движок
         engine = GameEngine(match_state)
@@ -312,416 +664,554 @@ async def start_game(message, match_id, players):
         engine.start_game()
         
         # Добавляем игру в активные
-        ACTIVE_MATCHES[match_id] = match_state
-        MATCH_ENGINES[match_id] = engine
+        ACTIVE_MATCHES[match_id] = engine
         
         # Удаляем игру из ожидающих
-        del WAITING_MATCHES[match_id]
-        
-        # Отправляем сообщение о начале игры
-        team1 = [match_state.players[GameConstants.PLAYER_1_1].name, match_state.players[GameConstants.PLAYER_1_2].name]
-        team2 = [match_state.players[GameConstants.PLAYER_2_1].name, match_state.players[GameConstants.PLAYER_2_2].name]
+        WAITING_MATCHES.pop(match_id, None)
         
-        await message.reply_text(
-            f"🎮 Игра начинается!\n\n"
-            f"Команда 1: {', '.join(team1)}\n"
-            f"Команда 2: {', '.join(team2)}\n\n"
-            f"Карты розданы. Ожидаем выбор козыря."
-        )
+        # Отправляем сообщение о начале игры, его ошибка не должна помешать раздаче карт
+        try:
+            await _send_message(
+                bot,
+                chat_id,
+                f"🎮 Игра начинается!\n\n"
+                f"Команда 1: {match_state.team1_header}\n"
+                f"Команда 2: {match_state.team2_header}\n\n"
+                f"Карты розданы. Ожидаем выбор козыря."
+            )
+        except Exception as e:
+            logger.error(f"Ошибка при отправке сообщения в чат {chat_id}: {e}")
         
         # Отправляем всем игрокам их карты
-        for player_position, player in match_state.players.items():
-            await send_player_cards(player, match_state, is_first=(player_position == match_state.first_player_index))
+        await send_cards_to_all_players(match_state, bot)
         
     except Exception as e:
         logger.error(f"Ошибка при начале игры: {e}")
-        await message.reply_text(f"Произошла ошибка при начале игры: {e}")
+        try:
+            await _send_message(bot, chat_id, f"Произошла ошибка при начале игры: {e}")
+        except Exception as send_error:
+            logger.error(f"Ошибка при отправке сообщения в чат {chat_id}: {send_error}")
 
 async def callback_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик callback-запросов от инлайн-клавиатуры."""
     query = update.callback_query
     await query.answer()  # Отвечаем на запрос, чтобы убрать часы загрузки
     
+    # Повторную доставку того же запроса не обрабатываем, иначе ход сыграется дважды
+    if query.id in SEEN_CALLBACKS:
+        logger.info(f"Повторный callback {query.id} пропущен")
+        return
+    SEEN_CALLBACKS[query.id] = None
+    if len(SEEN_CALLBACKS) > SEEN_CALLBACKS_SIZE:
+        SEEN_CALLBACKS.popitem(last=False)
+    
     logger.info(f"Получен callback {query.data} от пользователя {query.from_user.id}")
     
+    handler = CALLBACK_HANDLERS.get(query.data.partition('_')[0])
+    if handler is None:
+        logger.warning(f"Неизвестный callback {query.data}")
+        return
+    
+    # Нажатия игроков одного матча обрабатываем по очереди
+    game = PLAYER_TO_GAME.get(query.from_user.id)
+    if game is None:
+        # Выбор команды сам сообщает, что он недоступен, карты и козырь без игры не выбрать
+        if handler is _handle_team_callback:
+            await handler(query, context, game)
+        else:
+            await query.message.reply_text("Вы не состоите в игре.")
+        return
+    async with _match_lock(game.match_id):
+        await handler(query, context, game)
+    _release_match_lock(game.match_id)
+
+async def _handle_card_callback(query, context, game):
+    """Обработка выбора карты.
+    
+    game - запись PLAYER_TO_GAME игрока (вызывается только для игроков в игре).
+    """
     player_id = query.from_user.id
     username = query.from_user.username
-    first_name = query.from_user.first_name
     data = query.data
 
-    if data.startswith('card_'):
-        # Обработка выбора карты
+    try:
+        card_index = int(data[5:])  # после префикса 'card_'
+        
+        # Находим состояние игры и место игрока за столом
+        match_id = game.match_id
+        match_engine = ACTIVE_MATCHES[match_id]
+        match_state = match_engine.state
+        player_position = match_state.position_by_id[player_id]
+        
+        # Делаем ход
         try:
-            card_index = int(data.split('_')[1])
+            status, player, card = match_engine.play_turn(player_position, card_index)
             
-            # Находим состояние игры для этого игрока
-            match_id = PLAYER_TO_GAME[player_id]['id']
-            match_state = ACTIVE_MATCHES[match_id]
-            match_engine = MATCH_ENGINES[match_id]
-            player_position = PLAYER_TO_GAME[player_id]['position']
+            # Обновляем сообщение чтобы показать выбор карты
+            await query.edit_message_text(
+                text=f"{query.message.text}\n\nВы выбрали карту: {card}",
+                reply_markup=None  # Удаляем клавиатуру после выбора
+            )
             
-            # Делаем ход
-            try:
-                status, player, card = match_engine.play_turn(player_position, card_index)
-                
-                # Обновляем сообщение чтобы показать выбор карты
-                await query.edit_message_text(
-                    text=f"{query.message.text}\n\nВы выбрали карту: {card}",
-                    reply_markup=None  # Удаляем клавиатуру после выбора
-                )
-                
-                # Логируем ход
-                await storage.log_event(
-                    player_id,
-                    username,
-                    "play_card", 
-                    str(card)
-                )
-                
-                # Отправляем сообщение всем игрокам о ходе
-                await send_message_to_all_players(
-                    match_state,
-                    f"🃏 Игрок {player.name} сыграл картой: {card}"
-                )
-                
-                # Проверяем, завершен ли кон (4 карты на столе)
-                if status == GameConstants.Status.TRICK_COMPLETED:
-                    # Завершаем кон и определяем победителя
-                    trick_result = match_engine.complete_turn()
-                    status, winning_card, winning_player_index, trick_points = trick_result
-                    
-                    # Находим имя победителя
-                    winning_player = match_state.players[winning_player_index]
-                    winning_team = winning_player_index // 10 * 10
-                    
-                    # Отправляем сообщение о результате кона
-                    await send_message_to_all_players(
-                        match_state,
-                        f"👑 Игрок {winning_player.name} забирает взятку с {winning_card}!\n"
-                        f"Очки за взятку: {trick_points}\n\n"
-                    )
-                    
-                    # Проверяем, завершена ли игра (9 конов)
-                    if status == GameConstants.Status.GAME_COMPLETED:
-                        # Завершаем игру
-                        game_result = match_engine.complete_game()
-                        status, scores, losed_team, _, losed_points_text = game_result
-                        
-                        # Отправляем сообщение о результатах игры
-                        winning_team = 10 if losed_team == 20 else 20
-                        
-                        await send_message_to_all_players(
-                            match_state,
-                            f"🏆 Игра завершена!\n\n"
-                            f"Результаты раздачи:\n"
-                            f"Козырь хвалил: "
-                            f"{match_state.players[match_state.first_player_index]}\n"
-                            f"Команда 1: {match_state.players[GameConstants.PLAYER_1_1]} и "
-                            f"{match_state.players[GameConstants.PLAYER_1_2]}: "
-                            f"{scores[10]}\n"
-                            f"Команда 2: {match_state.players[GameConstants.PLAYER_2_1]} и "
-                            f"{match_state.players[GameConstants.PLAYER_2_2]}: "
-                            f"{scores[20]}\n\n"
-                            f"Команда {losed_team//10} получает {losed_points_text}\n\n"
-                            f"Общий счет матча:\n"
-                            f"Команда 1: {match_state.match_scores[10]}\n"
-                            f"Команда 2: {match_state.match_scores[20]}"
-                        )
-                        
-                        # Проверяем, завершен ли матч (одна из команд набрала 12+ очков)
-                        if status == GameConstants.Status.MATCH_COMPLETED:
-                            # Завершаем матч
-                            match_engine.complete_match()
-                            
-                            # Определяем победителя матча
-                            losing_team = 10 if match_state.match_scores[10] >= 12 else 20
-                            winning_team = 20 if losing_team == 10 else 10
-                            
-                            # Отправляем сообщение о результате матча
-                            await send_message_to_all_players(
-                                match_state,
-                                f"🎉 Матч завершен!\n\n"
-                                f"Победила Команда {winning_team//10}: "
-                                f"{match_state.players[winning_team + 1]} и "
-                                f"{match_state.players[winning_team + 2]}\n"
-                                f"Финальный счет:\n"
-                                f"Команда 1: {match_state.match_scores[10]}\n"
-                                f"Команда 2: {match_state.match_scores[20]}\n\n"
-                                f"Спасибо за игру! Используйте /create_game для новой игры."
-                            )
-                            
-                            # Удаляем игру из активных
-                            del ACTIVE_MATCHES[match_id]
-                            del MATCH_ENGINES[match_id]
-                            
-                            # Обновляем статистику игроков
-                            for pos, player in match_state.players.items():
-                                player_team = pos // 10 * 10
-                                won = player_team == winning_team
-                                # TODO: Здесь должен быть код для подсчета взяток каждого игрока
-                                tricks = 0  # Упрощенно, в реальности нужно считать
-                                shama_calls = 1 if pos == match_state.first_player_index else 0
-                                
-                                await storage.update_player_stats(player.id, won, tricks, shama_calls)
-                            
-                            return
-                        
-                        # Если матч не завершен, начинаем новую раздачу
-                        if status == GameConstants.Status.NEW_DEAL_READY:
-                            await send_message_to_all_players(
-                                match_state,
-                                "🃏 Подготовка к новой раздаче...\n"
-                                "Карты будут розданы автоматически."
-                            )
-                            
-                            # Запускаем новую игру с теми же игроками
-                            match_engine.start_game()
-
-                            # Отправляем всем игрокам их карты
-                            for player_position, player in match_state.players.items():
-                                await send_player_cards(player, match_state, is_first=(player_position == match_state.first_player_index))
-                            return
-                    
-                    # Если игра продолжается, переходим к следующему ходу
-                    if status == GameConstants.Status.PLAYING_CARDS:
-                        # Отправляем следующему игроку его карты и приглашение сделать ход
-                        next_player = match_state.players[match_state.current_player_index]
-                        await send_player_cards(next_player, match_state)
-                
-                else:
-                    # Отправляем следующему игроку его карты и приглашение сделать ход
-                    next_player = match_state.players[match_state.current_player_index]
-                    await send_player_cards(next_player, match_state)
+            # Логируем ход
+            log_event(
+                player_id,
+                username,
+                "play_card", 
+                str(card)
+            )
             
-            except InvalidPlayerAction as e:
-                logger.warning(f"Недопустимый ход: {e}")
-                await query.message.reply_text(f"Недопустимый ход: {e}")
-                await send_player_cards(match_state.players[player_position], match_state)
+            # Отправляем сообщение всем игрокам о ходе
+            await send_message_to_all_players(
+                match_state,
+                f"🃏 Игрок {player.name} сыграл картой: {card}"
+            )
             
-            except Exception as e:
-                logger.error(f"Ошибка при выполнении хода: {e}")
-                await query.message.reply_text(f"Произошла ошибка при выполнении хода: {e}")
-                
+            # Продолжаем матч после хода
+            await _apply_play_result(match_id, match_state, match_engine, status, context.bot)
+        
+        except InvalidPlayerAction as e:
+            logger.warning(f"Недопустимый ход: {e}")
+            await query.message.reply_text(f"Недопустимый ход: {e}")
+            await send_player_cards(match_state.players[player_position], match_state, context.bot)
+        
         except Exception as e:
-            logger.error(f"Ошибка при обработке выбора карты: {e}")
-            await query.message.reply_text(f"Произошла ошибка: {e}")
+            logger.error(f"Ошибка при выполнении хода: {e}")
+            await query.message.reply_text(f"Произошла ошибка при выполнении хода: {e}")
+            
+    except Exception as e:
+        logger.error(f"Ошибка при обработке выбора карты: {e}")
+        await query.message.reply_text(f"Произошла ошибка: {e}")
+
+async def _apply_play_result(match_id, match_state, match_engine, status, bot):
+    """Продолжает матч после хода.
     
-    elif data.startswith('trump_'):
-        # Обработка выбора козыря
+    Завершает кон, раздачу или матч, если они закончились,
+    и отправляет карты игроку, который ходит следующим.
+    """
+    # Кон не завершен (меньше 4 карт на столе), ходит следующий игрок
+    if status != Status.TRICK_COMPLETED:
+        next_player = match_state.players[match_state.current_player_index]
+        await send_player_cards(next_player, match_state, bot)
+        return
+    
+    # Завершаем кон и определяем победителя
+    status, winning_card, winning_player_index, trick_points = match_engine.complete_turn()
+    winning_player = match_state.players[winning_player_index]
+    
+    # Отправляем сообщение о результате кона
+    await send_message_to_all_players(
+        match_state,
+        f"👑 Игрок {winning_player.name} забирает взятку с {winning_card}!\n"
+        f"Очки за взятку: {trick_points}\n\n"
+    )
+    
+    # Если игра продолжается, переходим к следующему ходу
+    if status == Status.PLAYING_CARDS:
+        next_player = match_state.players[match_state.current_player_index]
+        await send_player_cards(next_player, match_state, bot)
+        return
+    
+    if status != Status.GAME_COMPLETED:
+        return
+    
+    # Завершаем игру (9 конов)
+    status, scores, losed_team, _, losed_points_text = match_engine.complete_game()
+    match_scores = match_state.match_scores
+    
+    # Отправляем сообщение о результатах игры
+    await send_message_to_all_players(
+        match_state,
+        f"🏆 Игра завершена!\n\n"
+        f"Результаты раздачи:\n"
+        f"Козырь хвалил: "
+        f"{match_state.players[match_state.first_player_index]}\n"
+        f"Команда 1: {match_state.team1_header}: {scores[10]}\n"
+        f"Команда 2: {match_state.team2_header}: {scores[20]}\n\n"
+        f"Команда {losed_team//10} получает {losed_points_text}\n\n"
+        f"Общий счет матча:\n"
+        f"Команда 1: {match_scores[10]}\n"
+        f"Команда 2: {match_scores[20]}"
+    )
+    
+    # Проверяем, завершен ли матч (одна из команд набрала 12+ очков)
+    if status == Status.MATCH_COMPLETED:
+        await _finish_match(match_id, match_state, match_engine)
+        return
+    
+    # Если матч не завершен, начинаем новую раздачу
+    if status == Status.NEW_DEAL_READY:
+        await send_message_to_all_players(
+            match_state,
+            "🃏 Подготовка к новой раздаче...\n"
+            "Карты будут розданы автоматически."
+        )
+        
+        # Запускаем новую игру с теми же игроками
+        match_engine.start_game()
+        
+        # Отправляем всем игрокам их карты
+        await send_cards_to_all_players(match_state, bot)
+
+async def _finish_match(match_id, match_state, match_engine):
+    """Завершает матч: объявляет победителя, удаляет матч и обновляет статистику."""
+    match_engine.complete_match()
+    players = match_state.players
+    match_scores = match_state.match_scores
+    
+    # Определяем победителя матча
+    losing_team = 10 if match_scores[10] >= 12 else 20
+    winning_team = 20 if losing_team == 10 else 10
+    
+    # Отправляем сообщение о результате матча
+    await send_message_to_all_players(
+        match_state,
+        f"🎉 Матч завершен!\n\n"
+        f"Победила Команда {winning_team//10}: "
+        f"{match_state.team1_header if winning_team == 10 else match_state.team2_header}\n"
+        f"Финальный счет:\n"
+        f"Команда 1: {match_scores[10]}\n"
+        f"Команда 2: {match_scores[20]}\n\n"
+        f"Спасибо за игру! Используйте /create_game для новой игры."
+    )
+    
+    # Удаляем игру и связанные с ней записи
+    _cleanup_match(match_id)
+    
+    # Обновляем статистику игроков одной записью в хранилище:
+    # взятки и хваления движок считает в Player.stat за весь матч
+    stats_deltas = {}
+    for pos, player in players.items():
+        won = PLAYER_TEAMS[pos] == winning_team
+        stats_deltas[player.id] = (won, player.stat['total_tricks'], player.stat['total_shama_calls'])
+    
+    await storage.update_player_stats_bulk(stats_deltas)
+
+async def _handle_trump_callback(query, context, game):
+    """Обработка выбора козыря.
+    
+    game - запись PLAYER_TO_GAME игрока (вызывается только для игроков в игре).
+    """
+    player_id = query.from_user.id
+    username = query.from_user.username
+    data = query.data
+
+    try:
+        suit = data[6:]  # после префикса 'trump_'
+        match_id = game.match_id
+        match_engine = ACTIVE_MATCHES[match_id]
+        match_state = match_engine.state
+        
         try:
-            suit = data.split('_')[1]
-            match_id = PLAYER_TO_GAME[player_id]['id']
-            match_state = ACTIVE_MATCHES[match_id]
-            match_engine = MATCH_ENGINES[match_id]
-            # player_position = PLAYER_TO_GAME[player_id]['position']
+            player_position = match_state.position_by_id[player_id]
+            status, player_name, trump = match_engine.set_trump_by_player(player_position, suit)
+            
+            # Обновляем сообщение чтобы показать выбор масти
+            suit_symbol = SUIT_SYMBOLS.get(suit, '?')
+            suit_text = SUIT_NAMES.get(suit, '?')
             
-            try:
-                match_engine = MATCH_ENGINES[match_id]
-                status, player_name, trump = match_engine.set_trump_by_player(match_state.first_player_index, suit)
-                
-                # Обновляем сообщение чтобы показать выбор масти
-                suit_symbol = GameConstants.SUIT_SYMBOLS.get(suit, '?')
-                suit_text = {
-                    'clubs': 'трефы',
-                    'diamonds': 'бубны',
-                    'hearts': 'червы',
-                    'spades': 'пики'
-                }.get(suit, '?')
-                
-                await query.edit_message_text(
-                    text=f"{query.message.text}\n\nВы выбрали козырь: {suit_symbol} ({suit_text})",
-                    reply_markup=None  # Удаляем клавиатуру после выбора
-                )
-
-                # Логируем выбор козыря
-                await storage.log_event(
-                    player_id,
-                    username,
-                    "set_trump", 
-                    trump
-                )
-                
-                # Отправляем сообщение всем игрокам
-                await send_message_to_all_players(
-                    match_state,
-                    f"🃏 Игрок {player_name} выбрал козырь: {suit_symbol} ({suit_text})\n\n"
-                    f"Начинаем игру! Ходит игрок с шамой."
-                )
-
-                # Подготавливаем ход первого игрока
-                player = match_state.players[match_state.current_player_index]
-                
-                # Отправляем первому игроку его карты и приглашение сделать ход
-                await send_player_cards(player, match_state)
-                
-            except Exception as e:
-                logger.error(f"Ошибка при установке козыря: {e}")
-                await query.message.reply_text(f"Произошла ошибка: {e}")
-                
-        except Exception as e:
-            logger.error(f"Ошибка при обработке выбора козыря: {e}")
-            await query.message.reply_text(f"Произошла ошибка: {e}")
-
-    elif data.startswith('team_'):
-        match_id = PLAYER_TO_GAME[player_id]['id']
-        team = data.split('_')[1]
-        if len(WAITING_MATCHES[match_id][data]) < 2:
-            position = int(f"{team}{len(WAITING_MATCHES[match_id][data]) + 1}")
             await query.edit_message_text(
-                text=f"{query.message.text}\n\nВы выбрали: Команду {team} ({WAITING_MATCHES[match_id][data]})",
+                text=f"{query.message.text}\n\nВы выбрали козырь: {suit_symbol} ({suit_text})",
                 reply_markup=None  # Удаляем клавиатуру после выбора
             )
-        else:
-            team = 1 if team == 2 else 2
-            position = int(f"{team}{len(WAITING_MATCHES[match_id][f'team_{team}']) + 1}")
-            await query.edit_message_text(
-                text=f"{query.message.text}\n\nВыбранная комнда заполнена, добавили Вас в Команду {team} ({WAITING_MATCHES[match_id][f'team_{team}']})",
-                reply_markup=None  # Удаляем клавиатуру после выбора
+
+            # Логируем выбор козыря
+            log_event(
+                player_id,
+                username,
+                "set_trump", 
+                trump
+            )
+            
+            # Отправляем сообщение всем игрокам
+            await send_message_to_all_players(
+                match_state,
+                f"🃏 Игрок {player_name} выбрал козырь: {suit_symbol} ({suit_text})\n\n"
+                f"Начинаем игру! Ходит игрок с шамой."
             )
 
-        
-        WAITING_MATCHES[match_id][data].append(f'{first_name} ({username})')
-        PLAYER_TO_GAME[player_id]['position'] = position
+            # Подготавливаем ход первого игрока
+            player = match_state.players[match_state.current_player_index]
+            
+            # Отправляем первому игроку его карты и приглашение сделать ход
+            await send_player_cards(player, match_state, context.bot)
+            
+        except Exception as e:
+            logger.error(f"Ошибка при установке козыря: {e}")
+            await query.message.reply_text(f"Произошла ошибка: {e}")
+            
+    except Exception as e:
+        logger.error(f"Ошибка при обработке выбора козыря: {e}")
+        await query.message.reply_text(f"Произошла ошибка: {e}")
 
-        # Получаем обновленный список игроков
-        players = WAITING_MATCHES[match_id]['players']
+async def _handle_team_callback(query, context, game):
+    """Обработка выбора команды.
+    
+    game - запись PLAYER_TO_GAME игрока (None, если он не в игре).
+    """
+    player_id = query.from_user.id
+    username = query.from_user.username
+    first_name = query.from_user.first_name
+    data = query.data
+
+    # Выбор доступен один раз и только пока игра ожидает игроков
+    match = WAITING_MATCHES.get(game.match_id) if game else None
+    if match is None or game.position is not None:
+        await query.edit_message_text(
+            text=f"{query.message.text}\n\nВыбор команды уже недоступен.",
+            reply_markup=None
+        )
+        return
+    
+    requested_team = int(data[5:])  # после префикса 'team_'
+    team, position = _take_seat(match, requested_team, f'{first_name} ({username})')
+    game.position = position
+    
+    if team == requested_team:
+        choice_text = f"Вы выбрали: Команду {team} ({', '.join(match.team(team))})"
+    else:
+        choice_text = f"Выбранная команда заполнена, добавили Вас в Команду {team} ({', '.join(match.team(team))})"
+    await query.edit_message_text(
+        text=f"{query.message.text}\n\n{choice_text}",
+        reply_markup=None  # Удаляем клавиатуру после выбора
+    )
+
+    await _announce_join(context.bot, game.match_id, match, player_id, first_name)
+
+# Обработчики callback-запросов по префиксу данных кнопки
+CALLBACK_HANDLERS = {
+    'card': _handle_card_callback,
+    'trump': _handle_trump_callback,
+    'team': _handle_team_callback,
+}
+
+class MessageBatcher:
+    """Буфер текстовых сообщений игрокам.
+    
+    Сообщения одному чату, поставленные в очередь в течение flush_delay
+    секунд, склеиваются и отправляются одним запросом к Telegram.
+    Сообщения с клавиатурой не буферизуются: перед их отправкой нужно
+    вызвать flush, чтобы сохранить порядок сообщений в чате.
+    """
+    
+    MAX_MESSAGE_LENGTH = 4096  # Ограничение Telegram на длину сообщения
+    
+    def __init__(self, flush_delay=0.15, max_chars=3500):
+        """
+        Args:
+            flush_delay: Время накопления сообщений, секунды
+            max_chars: Размер буфера, при котором он отправляется сразу
+        """
+        self.flush_delay = flush_delay
+        self.max_chars = max_chars
+        self._buffers = {}  # {chat_id: [text, ...]}
+        self._sizes = {}  # {chat_id: суммарная длина буфера}
+        self._timers = {}  # {chat_id: asyncio.Task}
+        self._locks = {}  # {chat_id: asyncio.Lock}
+        self._pending = {}  # {chat_id: число отправок в работе}
+    
+    def enqueue(self, chat_id, text):
+        """Ставит сообщение в буфер чата и планирует его отправку."""
+        self._buffers.setdefault(chat_id, []).append(text)
+        size = self._sizes.get(chat_id, 0) + len(text)
+        self._sizes[chat_id] = size
         
-        # Отправляем сообщения другим игрокам
-        for chat_id in players:
-            if chat_id > 0:
-                await context.bot.send_message(
-                    chat_id=chat_id,
-                    text=f"🎮 {first_name} присоединился к игре!\n\n"
-                            f"Текущие участники ({len(players)}/4):\n"
-                            f"Команда 1: {WAITING_MATCHES[match_id]['team_1']}\n"
-                            f"Команда 2: {WAITING_MATCHES[match_id]['team_2']}\n\n"
-                )
+        timer = self._timers.get(chat_id)
+        if size >= self.max_chars:
+            # Буфер заполнен, отправляем без ожидания
+            if timer is not None:
+                timer.cancel()
+            self._timers[chat_id] = asyncio.create_task(self._flush_later(chat_id, 0))
+        elif timer is None:
+            self._timers[chat_id] = asyncio.create_task(self._flush_later(chat_id, self.flush_delay))
+    
+    async def _flush_later(self, chat_id, delay):
+        """Отправляет буфер чата по истечении задержки."""
+        await asyncio.sleep(delay)
+        self._timers.pop(chat_id, None)
+        await self.flush(chat_id)
+    
+    async def flush(self, chat_id):
+        """Немедленно отправляет накопленные сообщения чата.
         
-        # Если набралось 4 игрока, начинаем игру
-        if len(players) == 4:
-            message = await context.bot.send_message(
-                chat_id=chat_id,
-                text="Набралось 4 игрока! Игра начинается..."
-            )
-            await start_game(message, match_id, players)
+        Дожидается отправки, уже начатой для этого чата, поэтому после
+        возврата все ранее поставленные сообщения доставлены.
+        """
+        timer = self._timers.pop(chat_id, None)
+        if timer is not None:
+            timer.cancel()
+        
+        lock = self._locks.get(chat_id)
+        if lock is None:
+            lock = self._locks[chat_id] = asyncio.Lock()
+        self._pending[chat_id] = self._pending.get(chat_id, 0) + 1
+        try:
+            async with lock:
+                texts = self._buffers.pop(chat_id, None)
+                self._sizes.pop(chat_id, None)
+                if not texts:
+                    return
+                for chunk in self._split(texts):
+                    try:
+                        await _send_message(_get_bot(), chat_id, chunk)
+                    except Exception as e:
+                        logger.error(f"Ошибка при отправке сообщения в чат {chat_id}: {e}")
+        finally:
+            # Удаляем блокировку, когда у чата не осталось отправок
+            self._pending[chat_id] -= 1
+            if not self._pending[chat_id]:
+                del self._pending[chat_id]
+                del self._locks[chat_id]
+    
+    async def flush_all(self):
+        """Отправляет буферы всех чатов (при остановке бота)."""
+        await asyncio.gather(*(self.flush(chat_id) for chat_id in list(self._buffers)))
+    
+    def _split(self, texts):
+        """Склеивает сообщения в блоки, не превышающие MAX_MESSAGE_LENGTH."""
+        chunk = []
+        size = 0
+        for text in texts:
+            if chunk and size + len(text) + 2 > self.MAX_MESSAGE_LENGTH:
+                yield "\n\n".join(chunk)
+                chunk = []
+                size = 0
+            chunk.append(text)
+            size += len(text) + 2
+        if chunk:
+            yield "\n\n".join(chunk)
 
-async def send_player_cards(player, match_state, is_first=False):
-    """Отправляет игроку его карты и инструкции для хода."""
-    if player.id < 0:  # Фиктивный игрок (бот)
+# Общий буфер исходящих текстовых сообщений
+BATCHER = MessageBatcher()
+
+# Клавиатура выбора козыря одинакова для всех раздач
+TRUMP_KEYBOARD = InlineKeyboardMarkup([
+    [
+        InlineKeyboardButton("♣ Трефы", callback_data="trump_clubs"),
+        InlineKeyboardButton("♦ Бубны", callback_data="trump_diamonds")
+    ],
+    [
+        InlineKeyboardButton("♥ Червы", callback_data="trump_hearts"),
+        InlineKeyboardButton("♠ Пики", callback_data="trump_spades")
+    ]
+])
+
+# Данные кнопок карт по индексу в руке (в руке не больше 9 карт)
+CARD_CALLBACKS = tuple(f"card_{i}" for i in range(9))
+
+async def send_player_cards(player, match_state, bot, is_first=False):
+    """Отправляет игроку его карты и инструкции для хода.
+    
+    bot - уже инициализированный экземпляр Bot обработчика (context.bot),
+    его пул соединений переиспользуется для отправки.
+    """
+    if player.is_bot:  # Фиктивный игрок (бот)
         return
         
-    # Форматируем карты игрока
-    hand = player.get_hand()
-    cards_text = " ".join([f"{card}" for card in hand])
+    # Форматируем карты игрока (каждую карту приводим к строке один раз)
+    card_labels = [str(card) for card in player.get_hand()]
+    
+    # Сообщение собираем построчно и склеиваем один раз в конце
+    lines = ["🃏 Ваши карты:", " ".join(card_labels), ""]
     
     # Создаем инлайн-клавиатуру
     keyboard = None
     
+    # Текущий ход и игроки нужны в нескольких ветках, читаем их один раз
+    players = match_state.players
+    current_index = match_state.current_player_index
+    current_player = players.get(current_index) if current_index else None
+    
     # Определяем сообщение в зависимости от ситуации
-    if is_first and match_state.status == GameConstants.Status.WAITING_TRUMP:
-        message_text = (
-            f"🃏 Ваши карты:\n{cards_text}\n\n"
-            f"У вас шама (шестерка треф)! Выберите козырь:"
+    if is_first and match_state.status == Status.WAITING_TRUMP:
+        lines.append("У вас шама (шестерка треф)! Выберите козырь:")
+        keyboard = TRUMP_KEYBOARD
+    elif current_player is not None and player.id == current_player.id:
+        # Если сейчас ход этого игрока
+        lines += (
+            "Статус игры:",
+            f"{match_state.team1_header} - счет: "
+            f"{match_state.match_scores[TEAM_1]}",
+            f"{match_state.team2_header} - счет: "
+            f"{match_state.match_scores[TEAM_2]}",
+            f"Козырь: {match_state.trump_symbol}, хвалил: "
+            f"{players[match_state.first_player_index]}",
+            f"Номер хода: {match_state.current_turn}",
+            f"Карты на столе: {match_state.show_table()}",
+            "Сейчас ваш ход! Выберите карту:",
         )
         
-        # Создаем кнопки для выбора козыря
-        keyboard = InlineKeyboardMarkup([
-            [
-                InlineKeyboardButton("♣ Трефы", callback_data="trump_clubs"),
-                InlineKeyboardButton("♦ Бубны", callback_data="trump_diamonds")
-            ],
-            [
-                InlineKeyboardButton("♥ Червы", callback_data="trump_hearts"),
-                InlineKeyboardButton("♠ Пики", callback_data="trump_spades")
-            ]
-        ])
+        # Создаем кнопки для выбора карт (максимум 3 карты в ряду)
+        card_buttons = [
+            InlineKeyboardButton(text=label, callback_data=CARD_CALLBACKS[i])
+            for i, label in enumerate(card_labels)
+        ]
+        buttons = [card_buttons[i:i + 3] for i in range(0, len(card_buttons), 3)]
+        keyboard = InlineKeyboardMarkup(buttons)
     else:
-        if match_state.current_player_index and player.id == match_state.players[match_state.current_player_index].id:
-            # Если сейчас ход этого игрока
-            message_text = (f"🃏 Ваши карты:\n{cards_text}\n\n"
-                            f"Статус игры:\n"
-                            f"{match_state.players[GameConstants.PLAYER_1_1]} и "
-                            f"{match_state.players[GameConstants.PLAYER_1_2]} - счет: "
-                            f"{match_state.match_scores[GameConstants.TEAM_1]}\n"
-                            f"{match_state.players[GameConstants.PLAYER_2_1]} и "
-                            f"{match_state.players[GameConstants.PLAYER_2_2]} - счет: "
-                            f"{match_state.match_scores[GameConstants.TEAM_2]}\n"
-                            f"Козырь: {GameConstants.SUIT_SYMBOLS[match_state.trump]}, хвалил: "
-                            f"{match_state.players[match_state.first_player_index]}\n"
-                            f"Номер хода: {match_state.current_turn}\n"
-                            f"Карты на столе: {match_state.show_table()}\n"
-                            f"Сейчас ваш ход! Выберите карту:"
-            )
-            
-            # Создаем кнопки для выбора карт (максимум 3 карты в ряду)
-            buttons = []
-            current_row = []
-            
-            for i, card in enumerate(hand):
-                current_row.append(InlineKeyboardButton(
-                    text=f"{card}", 
-                    callback_data=f"card_{i}"
-                ))
-                
-                # Создаем новый ряд после каждых 3 кнопок
-                if len(current_row) == 3:
-                    buttons.append(current_row)
-                    current_row = []
-            
-            # Добавляем оставшиеся кнопки, если есть
-            if current_row:
-                buttons.append(current_row)
-                
-            keyboard = InlineKeyboardMarkup(buttons)
-            
-        else:
-            # Если ход другого игрока
-            current_player_name = "?"
-            if match_state.current_player_index:
-                current_player_name = match_state.players[match_state.current_player_index].name
-                
-            message_text = (
-                f"🃏 Ваши карты:\n{cards_text}\n\n"
-                f"Сейчас ход игрока {current_player_name}."
-            )
+        # Если ход другого игрока
+        current_player_name = current_player.name if current_player is not None else "?"
+        lines.append(f"Сейчас ход игрока {current_player_name}.")
+    
+    message_text = "\n".join(lines)
+    
+    # Сначала доставляем накопленные объявления, чтобы не нарушить порядок
+    await BATCHER.flush(player.id)
     
     try:
         # Отправляем сообщение игроку в личку
-        bot = Bot(BOT_TOKEN)
-        
         # Если есть клавиатура, отправляем с ней
         if keyboard:
-            await bot.send_message(
-                chat_id=player.id, 
-                text=message_text,
-                reply_markup=keyboard
-            )
+            await _send_message(bot, player.id, message_text, reply_markup=keyboard)
         else:
-            await bot.send_message(chat_id=player.id, text=message_text)
+            await _send_message(bot, player.id, message_text)
             
         logger.info(f"Отправлены карты игроку {player.name} (ID: {player.id})")
     except Exception as e:
         logger.error(f"Ошибка при отправке карт игроку {player.name} (ID: {player.id}): {e}")
 
+async def send_cards_to_all_players(match_state, bot):
+    """Отправляет всем игрокам их карты после раздачи.
+    
+    Отправка идет параллельно (send_player_cards только читает состояние
+    матча), ошибка у одного игрока не прерывает отправку остальным.
+    """
+    first_player = match_state.players[match_state.first_player_index]
+    results = await asyncio.gather(*(
+        send_player_cards(player, match_state, bot, is_first=(player is first_player))
+        for player in match_state.real_players
+    ), return_exceptions=True)
+    for result in results:
+        if isinstance(result, Exception):
+            logger.warning(f"Не удалось отправить карты игроку: {result}")
+
 async def send_message_to_all_players(match_state, message_text):
-    """Отправляет сообщение всем игрокам в личку."""
-    bot = Bot(BOT_TOKEN)
-    for player_position, player in match_state.players.items():
-        if player.id > 0:  # Только реальным игрокам
-            try:
-                await bot.send_message(chat_id=player.id, text=message_text)
-            except Exception as e:
-                logger.error(f"Ошибка при отправке сообщения игроку {player.name} (ID: {player.id}): {e}")
+    """Отправляет сообщение всем игрокам в личку.
+    
+    Сообщения ставятся в буфер BATCHER: несколько объявлений за один ход
+    уходят игроку одним запросом к Telegram.
+    """
+    for player in match_state.real_players:
+        BATCHER.enqueue(player.id, message_text)
 
 async def start_game_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик команды /help."""
     logger.info(f"Получена команда /start_game от пользователя {update.effective_user.username}")
     
     player_id = update.effective_user.id
-    match_id = PLAYER_TO_GAME[player_id]['id']
-    players = WAITING_MATCHES[match_id]['players']
-
-    await start_game(update.message, match_id, players)
+    game = PLAYER_TO_GAME.get(player_id)
+    if game is None:
+        await update.message.reply_text("Вы не состоите в игре.")
+        return
+    match_id = game.match_id
+    
+    async with _match_lock(match_id):
+        match = WAITING_MATCHES.get(match_id)
+        if match is None:
+            await update.message.reply_text("Игра уже начата.")
+        else:
+            await start_game(context.bot, update.effective_chat.id, match_id, match.players)
+    _release_match_lock(match_id)
 
 async def help_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> None:
     """Обработчик команды /help."""
@@ -751,7 +1241,7 @@ async def info_command(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
     """Обработчик команды /info для вывода информации о боте."""
     logger.info(f"Получена команда /info от пользователя {update.effective_user.id}")
     
-    bot_info = await context.bot.get_me()
+    bot_info = BOT_INFO
     
     info_text = (
         f"🤖 Информация о боте:\n"
@@ -797,17 +1287,20 @@ async def status_command(update: Update, context: ContextTypes.DEFAULT_TYPE) ->
     player_id = update.effective_user.id
     
     # Проверяем, есть ли активная игра в чате
-    if player_id in PLAYER_TO_GAME and PLAYER_TO_GAME[player_id]['status'] == 'active':
-        match_state = ACTIVE_MATCHES[PLAYER_TO_GAME[player_id]['id']]
+    game = PLAYER_TO_GAME.get(player_id)
+    game_status = game.status if game is not None else None
+    if game_status == 'active':
+        match_state = ACTIVE_MATCHES[game.match_id].state
         
         # Определяем статус игры и формируем сообщение
         status_text = await format_game_status(match_state)
         
         await update.message.reply_text(status_text)
-    elif player_id in PLAYER_TO_GAME and PLAYER_TO_GAME[player_id]['status'] == 'waiting':
+    elif game_status == 'waiting':
         # Есть игра в ожидании
-        players = WAITING_MATCHES[PLAYER_TO_GAME[player_id]['id']]['players']
-        player_list = "\n".join([f"• {p_data['name']}" for p_data in players.values()])
+        match = WAITING_MATCHES[game.match_id]
+        players = match.players
+        player_list = "\n".join(match.player_lines)
         
         await update.message.reply_text(
             f"🎮 Игра ожидает игроков.\n\n"
@@ -861,32 +1354,32 @@ async def text_handler(update: Update, context: ContextTypes.DEFAULT_TYPE) -> No
         "Отправьте /help чтобы увидеть список доступных команд."
     )
 
+# Описания статусов игры для /status
+STATUS_NAMES = {
+    Status.WAITING_PLAYERS: "Ожидание игроков",
+    Status.PLAYERS_ADDED: "Все игроки добавлены",
+    Status.CARDS_DEALT: "Карты розданы",
+    Status.WAITING_TRUMP: "Ожидание выбора козыря",
+    Status.TRUMP_SELECTED: "Козырь выбран",
+    Status.PLAYING_CARDS: "Игра идет",
+    Status.PLAYED_CARD_1: "1 карта на столе",
+    Status.PLAYED_CARD_2: "2 карты на столе",
+    Status.PLAYED_CARD_3: "3 карты на столе",
+    Status.TRICK_COMPLETED: "Кон завершен",
+    Status.GAME_COMPLETED: "Игра завершена",
+    Status.NEW_DEAL_READY: "Готовы к новой раздаче",
+    Status.MATCH_COMPLETED: "Матч завершен",
+    Status.GAME_FINISHED: "Игра полностью завершена"
+}
+
 async def format_game_status(match_state):
     """Форматирует текущий статус игры для отображения."""
-    status_codes = {
-        GameConstants.Status.WAITING_PLAYERS: "Ожидание игроков",
-        GameConstants.Status.PLAYERS_ADDED: "Все игроки добавлены",
-        GameConstants.Status.CARDS_DEALT: "Карты розданы",
-        GameConstants.Status.WAITING_TRUMP: "Ожидание выбора козыря",
-        GameConstants.Status.TRUMP_SELECTED: "Козырь выбран",
-        GameConstants.Status.PLAYING_CARDS: "Игра идет",
-        GameConstants.Status.PLAYED_CARD_1: "1 карта на столе",
-        GameConstants.Status.PLAYED_CARD_2: "2 карты на столе",
-        GameConstants.Status.PLAYED_CARD_3: "3 карты на столе",
-        GameConstants.Status.TRICK_COMPLETED: "Кон завершен",
-        GameConstants.Status.GAME_COMPLETED: "Игра завершена",
-        GameConstants.Status.NEW_DEAL_READY: "Готовы к новой раздаче",
-        GameConstants.Status.MATCH_COMPLETED: "Матч завершен",
-        GameConstants.Status.GAME_FINISHED: "Игра полностью завершена"
-    }
-    
-    status_text = f"🎮 Статус игры: {status_codes.get(match_state.status, 'Неизвестный')}\n\n"
+    status_text = f"🎮 Статус игры: {STATUS_NAMES.get(match_state.status, 'Неизвестный')}\n\n"
     
     # Добавляем информацию об игроках
     status_text += "Игроки:\n"
     for pos, player in match_state.players.items():
-        team = "1" if pos // 10 == 1 else "2"
-        status_text += f"• Команда {team}: {player.name}"
+        status_text += f"• Команда {PLAYER_TEAMS[pos] // 10}: {player.name}"
         if pos == match_state.first_player_index:
             status_text += " (шама)"
         if pos == match_state.current_player_index:
@@ -895,8 +1388,7 @@ async def format_game_status(match_state):
     
     # Добавляем информацию о козыре
     if match_state.trump:
-        trump_symbol = GameConstants.SUIT_SYMBOLS.get(match_state.trump, '?')
-        status_text += f"\nКозырь: {trump_symbol}\n"
+        status_text += f"\nКозырь: {match_state.trump_symbol}\n"
     
     # Добавляем информацию о счете
     status_text += f"\nСчет в игре:\n"
@@ -918,9 +1410,10 @@ async def error_handler(update, context) -> None:
     
     # Уведомляем пользователя об ошибке, если возможно
     if update and update.effective_chat:
-        await context.bot.send_message(
-            chat_id=update.effective_chat.id,
-            text="Произошла ошибка при обработке вашего запроса."
+        await _send_message(
+            context.bot,
+            update.effective_chat.id,
+            "Произошла ошибка при обработке вашего запроса."
         )
 
 async def cleanup_bot() -> bool:
@@ -956,6 +1449,24 @@ async def cleanup_bot() -> bool:
         logger.error(f"Непредвиденная ошибка при очистке: {e}")
         return False
 
+def build_handlers():
+    """Возвращает обработчики обновлений бота в порядке приоритета."""
+    return (
+        CommandHandler("start", start_command),
+        CommandHandler("help", help_command),
+        CommandHandler("ping", ping_command),
+        CommandHandler("info", info_command),
+        CommandHandler("rules", rules_command),
+        CommandHandler("create_game", create_game_command),
+        CommandHandler("start_game", start_game_command),
+        CommandHandler("status", status_command),
+        CommandHandler("stats", stats_command),
+        # Обработчик текстовых сообщений
+        MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler),
+        # Обработчик callback-запросов от инлайн-клавиатуры
+        CallbackQueryHandler(callback_handler),
+    )
+
 async def run_bot() -> None:
     """Основная функция запуска бота."""
     try:
@@ -965,25 +1476,25 @@ async def run_bot() -> None:
             logger.error("Не удалось инициализировать хранилище данных! Бот не может быть запущен.")
             return
         
-        # Создаем и настраиваем приложение
-        application = Application.builder().token(BOT_TOKEN).build()
+        # Запускаем фоновую запись событий
+        global LOG_QUEUE
+        LOG_QUEUE = asyncio.Queue(maxsize=LOG_QUEUE_SIZE)
+        log_flusher_task = asyncio.create_task(_log_flusher())
         
-        # Регистрируем обработчики команд
-        application.add_handler(CommandHandler("start", start_command))
-        application.add_handler(CommandHandler("help", help_command))
-        application.add_handler(CommandHandler("ping", ping_command))
-        application.add_handler(CommandHandler("info", info_command))
-        application.add_handler(CommandHandler("rules", rules_command))
-        application.add_handler(CommandHandler("create_game", create_game_command))
-        application.add_handler(CommandHandler("start_game", start_game_command))
-        application.add_handler(CommandHandler("status", status_command))
-        application.add_handler(CommandHandler("stats", stats_command))
+        # Запускаем периодическую очистку устаревших игр
+        sweep_task = asyncio.create_task(_sweep_stale_matches())
         
-        # Обработчик текстовых сообщений
-        application.add_handler(MessageHandler(filters.TEXT & ~filters.COMMAND, text_handler))
+        # Создаем и настраиваем приложение
+        # Обновления разных чатов обрабатываются параллельно, одного чата - по очереди
+        application = (
+            Application.builder()
+            .token(BOT_TOKEN)
+            .concurrent_updates(ChatOrderedUpdateProcessor())
+            .build()
+        )
         
-        # Обработчик callback-запросов от инлайн-клавиатуры
-        application.add_handler(CallbackQueryHandler(callback_handler))
+        # Регистрируем обработчики команд, сообщений и инлайн-клавиатуры
+        application.add_handlers(build_handlers())
         
         # Регистрируем обработчик ошибок
         application.add_error_handler(error_handler)
@@ -992,15 +1503,31 @@ async def run_bot() -> None:
         logger.info("Инициализация бота...")
         await application.initialize()
         
+        # Данные бота неизменны, запрашиваем их один раз
+        global BOT_INFO, BOT
+        BOT_INFO = await application.bot.get_me()
+        BOT = application.bot
+        
         logger.info("Запуск бота...")
         await application.start()
         
-        # Запускаем получение обновлений
-        await application.updater.start_polling(
-            drop_pending_updates=True,
-            allowed_updates=["message", "callback_query"],
-            poll_interval=1.0,
-        )
+        # Запускаем получение обновлений: вебхук, если задан публичный адрес, иначе опрос
+        if WEBHOOK_URL:
+            await application.updater.start_webhook(
+                listen=WEBHOOK_LISTEN,
+                port=WEBHOOK_PORT,
+                url_path=BOT_TOKEN,
+                webhook_url=f"{WEBHOOK_URL.rstrip('/')}/{BOT_TOKEN}",
+                drop_pending_updates=True,
+                allowed_updates=["message", "callback_query"],
+            )
+            logger.info(f"Обновления принимаются через вебхук на порту {WEBHOOK_PORT}")
+        else:
+            await application.updater.start_polling(
+                drop_pending_updates=True,
+                allowed_updates=["message", "callback_query"],
+                poll_interval=1.0,
+            )
         
         logger.info("Бот успешно запущен и готов к работе!")
         
@@ -1032,12 +1559,28 @@ async def run_bot() -> None:
         logger.info("Остановка бота...")
         try:
             if 'application' in locals():
+                # Отправляем сообщения, оставшиеся в буфере, пока бот еще работает
+                await BATCHER.flush_all()
                 await application.updater.stop()
                 await application.stop()
                 await application.shutdown()
         except Exception as e:
             logger.error(f"Ошибка при остановке бота: {e}")
         finally:
+            if 'sweep_task' in locals():
+                sweep_task.cancel()
+            # Дописываем события, оставшиеся в очереди
+            if 'log_flusher_task' in locals():
+                log_flusher_task.cancel()
+                await asyncio.gather(log_flusher_task, return_exceptions=True)
+                remaining = []
+                while not LOG_QUEUE.empty():
+                    remaining.append(LOG_QUEUE.get_nowait())
+                if remaining:
+                    await _flush_log_batch(remaining)
+            # Закрываем хранилище (сохраняет счетчик событий, закрывает файлы)
+            if storage is not None:
+                storage.close()
             logger.info("Бот остановлен")
 
 def main():
@@ -1051,6 +1594,11 @@ def main():
     logger.info(f"Запуск бота с токеном: {BOT_TOKEN[:5]}...{BOT_TOKEN[-5:]}")
     
     try:
+        # Используем uvloop, если он установлен
+        if uvloop is not None:
+            uvloop.install()
+            logger.info("Используется цикл событий uvloop")
+        
         # Создаем и запускаем цикл событий
         loop = asyncio.new_event_loop()
         asyncio.set_event_loop(loop)
@@ -7,7 +7,7 @@ from unittest.mock import patch
 # Добавляем родительский каталог в путь для абсолютных импортов
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
 
-from core import Card, Player, MatchState, GameEngine, InvalidPlayerAction
+from core import Card, Player, BotPlayer, MatchState, GameEngine, InvalidPlayerAction
 from constants import GameConstants
 
 class TestCard(unittest.TestCase):
@@ -21,6 +21,14 @@ class TestCard(unittest.TestCase):
         card = Card('diamonds', '10', 10)
         self.assertEqual(repr(card), '10♦')
         
+    def test_card_id(self):
+        """Проверка номера карты и восстановления карты по номеру"""
+        card = Card('clubs', '6', 0)
+        self.assertEqual(card.id, 18)
+        restored = Card.from_id(card.id)
+        self.assertEqual((restored.suit, restored.rank, restored.value), ('clubs', '6', 0))
+        self.assertEqual(Card.from_id(35).value, 11)
+        
     def test_card_symbols(self):
         """Проверка корректного отображения символов мастей"""
         self.assertEqual(GameConstants.SUIT_SYMBOLS['hearts'], '♥')
@@ -72,6 +80,13 @@ class TestPlayer(unittest.TestCase):
         self.player.clear_hand()
         self.assertEqual(len(self.player.hand), 0)
         
+    def test_set_hand(self):
+        """Тест замены карт на руке игрока"""
+        self.player.add_card(Card('hearts', '9', 0))
+        cards = [Card('clubs', '6', 0), Card('spades', 'J', 2)]
+        self.player.set_hand(cards)
+        self.assertEqual(self.player.get_hand(), cards)
+        
     def test_player_repr(self):
         """Тест строкового представления игрока"""
         self.assertEqual(repr(self.player), 'Test Player')
@@ -112,6 +127,7 @@ class TestMatchState(unittest.TestCase):
         """Тест установки козыря"""
         self.state.set_trump('hearts')
         self.assertEqual(self.state.trump, 'hearts')
+        self.assertEqual(self.state.trump_symbol, '♥')
         self.assertEqual(self.state.status, GameConstants.Status.TRUMP_SELECTED)
         
     def test_add_player(self):
@@ -121,6 +137,16 @@ class TestMatchState(unittest.TestCase):
         self.assertEqual(self.state.status, GameConstants.Status.WAITING_PLAYERS)
         self.assertEqual(sum(1 for p in self.state.players.values() if p is not None), 1)
         self.assertEqual(self.state.players[11], player)
+        self.assertEqual(self.state.position_by_id[1], 11)
+        
+    def test_add_bot_player(self):
+        """Тест добавления бота: он занимает место, но не получает сообщений"""
+        player = Player(1, 'Test Player')
+        bot = BotPlayer(-1, 'Bot')
+        self.state.add_player(11, player)
+        self.state.add_player(12, bot)
+        self.assertEqual(self.state.players[12], bot)
+        self.assertEqual(self.state.real_players, [player])
         
     def test_add_player_when_full(self):
         """Тест добавления игрока, когда стол заполнен"""
@@ -388,12 +414,13 @@ class TestGameEngine(unittest.TestCase):
         self.state.first_player_index = 11  # Шама у игрока 11
         self.state.game_scores = {10: 20, 20: 30}  # Команда 10 проиграла с меньшим счетом
         
-        status, scores, losed_team, losed_points = self.engine.complete_game()
+        status, scores, losed_team, losed_points, losed_points_text = self.engine.complete_game()
         
         self.assertEqual(status, GameConstants.Status.NEW_DEAL_READY)  # Готов к новой раздаче
         self.assertEqual(scores, {10: 20, 20: 30})
         self.assertEqual(losed_team, 10)  # Проигравшая команда
         self.assertEqual(losed_points, 6)  # Очки за проигрыш (меньше 30 очков, с шамой)
+        self.assertEqual(losed_points_text, 'шесть очков')
         self.assertEqual(self.state.match_scores[10], 6)  # Очки добавлены
         self.assertEqual(self.state.game_scores[10], 0)  # Счет игры обнулен
         self.assertEqual(self.state.game_scores[20], 0)
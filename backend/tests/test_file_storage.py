@@ -0,0 +1,87 @@
+import unittest
+import sys
+import os
+import tempfile
+import json
+import datetime
+
+# Добавляем родительский каталог в путь для абсолютных импортов
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+from file_storage import FileStorage
+
+class TestFileStorage(unittest.IsolatedAsyncioTestCase):
+
+    def setUp(self):
+        # Храним данные во временной директории
+        self.tmp_dir = tempfile.TemporaryDirectory()
+        self.storage = FileStorage(self.tmp_dir.name)
+
+    def tearDown(self):
+        self.storage.close()
+        self.tmp_dir.cleanup()
+
+    async def test_get_or_create_player(self):
+        """Тест создания и повторного получения игрока"""
+        created = await self.storage.get_or_create_player(1, 'user_1', 'Name 1')
+        self.assertEqual(created['id'], 1)
+        self.assertEqual(created['games'], 0)
+
+        fetched = await self.storage.get_or_create_player(1, 'user_1', 'Name 1')
+        self.assertEqual(fetched['name'], 'Name 1')
+
+    async def test_top_players(self):
+        """Тест таблицы лидеров по количеству побед"""
+        for player_id in (1, 2, 3):
+            await self.storage.get_or_create_player(player_id, f'user_{player_id}', f'Name {player_id}')
+        await self.storage.update_player_stats(2, True, 3)
+        await self.storage.update_player_stats(2, True, 1)
+        await self.storage.update_player_stats(3, True, 0)
+        await self.storage.update_player_stats(1, False, 2)
+
+        leaders = await self.storage.top_players(2)
+
+        self.assertEqual([p['id'] for p in leaders], [2, 3])
+        self.assertEqual(leaders[0]['wins'], 2)
+        self.assertEqual(leaders[0]['win_rate'], 100.0)
+
+    async def test_update_player_stats_bulk(self):
+        """Тест обновления статистики нескольких игроков за один вызов"""
+        for player_id in (1, 2):
+            await self.storage.get_or_create_player(player_id, f'user_{player_id}', f'Name {player_id}')
+
+        result = await self.storage.update_player_stats_bulk({1: (True, 4, 1), 2: (False, 2, 0)})
+
+        self.assertTrue(result)
+        stats_1 = await self.storage.get_player_stats(1)
+        stats_2 = await self.storage.get_player_stats(2)
+        self.assertEqual((stats_1['games'], stats_1['wins'], stats_1['total_tricks'], stats_1['total_shama_calls']), (1, 1, 4, 1))
+        self.assertEqual((stats_2['games'], stats_2['wins'], stats_2['total_tricks'], stats_2['total_shama_calls']), (1, 0, 2, 0))
+
+    async def test_log_event_ids_are_monotonic(self):
+        """Тест монотонности ID событий между перезапусками хранилища"""
+        first = await self.storage.log_event(1, 'user_1', 'create_game', 'match')
+        second = await self.storage.log_event(1, 'user_1', 'join_match', 'match')
+        self.assertLess(int(first.split('-')[1]), int(second.split('-')[1]))
+
+        # Счетчик сохраняется при закрытии и продолжается после перезапуска
+        self.storage.close()
+        self.storage = FileStorage(self.tmp_dir.name)
+        third = await self.storage.log_event(1, 'user_1', 'play_card', '6♣')
+        self.assertEqual(int(third.split('-')[1]), int(second.split('-')[1]) + 1)
+
+    async def test_log_events_batch(self):
+        """Тест записи пачки событий одной операцией"""
+        now = datetime.datetime.now()
+        events = [(1, 'user_1', 'play_card', f'{rank}♠', now) for rank in ('6', '7', '8')]
+
+        event_ids = await self.storage.log_events_batch(events)
+
+        self.assertEqual(len(event_ids), 3)
+        with open(self.storage.events_file, encoding='utf-8') as f:
+            lines = [json.loads(line) for line in f]
+        self.assertEqual([e['id'] for e in lines], event_ids)
+        self.assertEqual(lines[2]['event_data'], '8♠')
+
+if __name__ == '__main__':
+    unittest.main()
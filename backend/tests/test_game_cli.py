@@ -1,7 +1,7 @@
 import unittest
 import sys
 import os
-from unittest.mock import patch, MagicMock, call
+from unittest.mock import patch, MagicMock
 
 # Добавляем родительский каталог в путь для абсолютных импортов
 sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
@@ -81,15 +81,14 @@ class TestGameCLI(unittest.TestCase):
         
         game_cli.show_hand(hand)
         
-        # Проверяем, что был вызов print для каждой карты
-        expected_calls = [
-            call('1:  A♥', end=' || '),
-            call('2:  K♦', end=' || '),
-            call('3:  6♣', end='\n'),
-            call('4:  Q♠', end=' || '),
-            call()
-        ]
-        mock_print.assert_has_calls(expected_calls)
+        # Проверяем, что рука выведена одним вызовом print по 3 карты в строке
+        mock_print.assert_called_once_with('1:  A♥ || 2:  K♦ || 3:  6♣\n4:  Q♠')
+    
+    @patch('builtins.print')
+    def test_show_hand_with_title(self, mock_print):
+        """Тест вывода заголовка и карт одним вызовом print"""
+        game_cli.show_hand([Card('hearts', 'A', 11)], 'Ваши карты:')
+        mock_print.assert_called_once_with('Ваши карты:\n1:  A♥')
     
     @patch('builtins.print')
     def test_show_state(self, mock_print):
@@ -125,6 +124,8 @@ class TestGameCLI(unittest.TestCase):
         self.assertEqual(state.players[12].name, 'Player B')
         self.assertEqual(state.players[21].name, 'Player C')
         self.assertEqual(state.players[22].name, 'Player D')
+        self.assertEqual(state.team1_header, 'Player A и Player B')
+        self.assertEqual(state.team2_header, 'Player C и Player D')
         
     @patch('builtins.print')
     @patch('builtins.input', return_value='3')  # Выбор пункта "Выход"